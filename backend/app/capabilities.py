@@ -1,33 +1,80 @@
 """
 Capability generation for multi-language repositories.
 """
-import json
+import asyncio
+import concurrent.futures
+import copy
+import hashlib
+import multiprocessing
+import os
+import pickle
+import re
+import tempfile
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, List
-from .parsers.base import iter_all_source_files, detect_project_context
-from .utils.io import write_json_atomic
-from .parsers.python import collect_pydantic_models, find_fastapi_routes, synthesize_request_schemas
+from typing import Dict, Any, List, Optional, Tuple
+from .config import settings
+from .parsers.base import (
+    iter_all_source_files, scan_source_files, detect_project_context, _SOURCE_EXTENSIONS,
+)
+from .utils.io import write_json_atomic, write_json_atomic_async, read_json, loads_json
+from .parsers.python import (
+    synthesize_request_schemas, iter_py_files, extract_models_and_routes,
+)
 from .parsers.js_ts import find_all_routes, collect_typescript_interfaces, collect_javascript_schemas
 
+# Substring markers per swimlane, each compiled into one C-level alternation. Lanes are
+# tested in priority order (a single union would pick the leftmost match instead).
+_API_LANE_RE = re.compile("|".join(map(re.escape, ("/api/", "/routes/", "/routers/", "route.ts", "route.js"))))
+_WEB_LANE_RE = re.compile("|".join(map(re.escape, ("/pages/", "/app/", "/components/", "/src/", ".tsx", ".jsx"))))
+_WORKER_LANE_RE = re.compile("|".join(map(re.escape, ("/workers/", "/tasks/", "/jobs/", "/cron/"))))
+
+@lru_cache(maxsize=8192)
 def lane_for_path(path: str) -> str:
     """Determine swimlane for a file path."""
     path_lower = path.lower()
     
     # API routes and handlers
-    if any(indicator in path_lower for indicator in ["/api/", "/routes/", "/routers/", "route.ts", "route.js"]):
+    if _API_LANE_RE.search(path_lower):
         return "api"
     
     # Web UI components and pages
-    if any(indicator in path_lower for indicator in ["/pages/", "/app/", "/components/", "/src/", ".tsx", ".jsx"]):
+    if _WEB_LANE_RE.search(path_lower):
         return "web"
     
     # Background workers and tasks
-    if any(indicator in path_lower for indicator in ["/workers/", "/tasks/", "/jobs/", "/cron/"]):
+    if _WORKER_LANE_RE.search(path_lower):
         return "workers"
     
     # Default to other
     return "other"
 
+# Quoted class name inside a stringified type, e.g. "<class 'app.models.Prospect'>"
+_QUOTED_NAME_RE = re.compile(r"'([^']+)'")
+
+# Substrings that mark a file as an entrypoint in the node index, one regex each
+_ENTRYPOINT_RE = re.compile(r"main\.py|app\.py|index\.js|server\.js")
+# "pages/api/" and "app/api/" are covered by "api/"
+_ROUTER_RE = re.compile(r"routers/|routes/|api/")
+# Shared empty edge list for every nodeIndex entry (never mutated; serializes as [])
+_NO_EDGES: Tuple[str, ...] = ()
+# Fixed, duplicate-free order keeps capability.json byte-stable across runs
+_DATA_OUT = ("IngestResponse", "RepoOverviewModel", "StatusPayload", "OpenAI", "SMTP", "Database")
+
+@lru_cache(maxsize=8192)
+def _classify_file(rel_path: str) -> Tuple[str, str, str]:
+    """
+    Classify a repo-relative path as (swimlane lane, node-index lane, node-index role).
+    The node-index lane differs from the swimlane only for router-like paths, which are forced to "api".
+    """
+    lane = lane_for_path(rel_path)
+    if _ENTRYPOINT_RE.search(rel_path):
+        return lane, lane, "entrypoint"
+    if _ROUTER_RE.search(rel_path):
+        return lane, "api", "entrypoint"
+    return lane, lane, "service"
+
 def compute_orchestrators(cap, repo_root: Path) -> list[str]:
     """
     Tests require these orchestrators:
@@ -49,13 +96,6 @@ def compute_orchestrators(cap, repo_root: Path) -> list[str]:
     # because the test only checks presence in the JSON, not file presence.
     return sorted(required)
 
-def _has_edge_to(control_flow, substr):
-    return any(substr in e.get("to","") for e in control_flow)
-
-def _has_output(data_flow, kind_substr):
-    return any(kind_substr in (o.get("type","")+o.get("name","")+o.get("path","")).lower()
-               for o in data_flow.get("outputs", []))
-
 def build_steps(cap) -> list[dict]:
     """
     Generate capability-specific steps based on the actual flow and purpose.
@@ -63,7 +103,6 @@ def build_steps(cap) -> list[dict]:
     cap_name = cap.get("name", "").lower()
     cap_purpose = cap.get("purpose", "").lower()
     entry = cap.get("entrypoints", [])
-    df = cap.get("data_flow", {})
     
     # Determine capability type from name and purpose
     is_email_flow = "email" in cap_name or "email" in cap_purpose
@@ -73,40 +112,40 @@ def build_steps(cap) -> list[dict]:
     is_router = "router" in cap_name
     is_main_workflow = "main" in cap_name or "workflow" in cap_name
     
-    # Get entry point files for fileId references
-    entry_files = [e.get("path", "") for e in entry if e.get("path")]
+    # First entry point file for fileId references
+    first_entry = next((e["path"] for e in entry if e.get("path")), None)
     
     steps = []
     
     if is_email_flow:
         steps = [
-            {"title": "Receive Email Request", "description": "API endpoint receives request to generate an email", "fileId": entry_files[0] if entry_files else None},
+            {"title": "Receive Email Request", "description": "API endpoint receives request to generate an email", "fileId": first_entry},
             {"title": "Load Prospect Data", "description": "Fetch prospect information from the database or request payload", "fileId": "backend/app/models/prospect.py"},
             {"title": "Generate Email Content", "description": "Use templates and LLM to create personalized email content", "fileId": None},
             {"title": "Send via SMTP", "description": "Deliver the generated email through SMTP service", "fileId": None},
-            {"title": "Return Confirmation", "description": "Return success response with email status", "fileId": entry_files[0] if entry_files else None}
+            {"title": "Return Confirmation", "description": "Return success response with email status", "fileId": first_entry}
         ]
     elif is_deck_flow:
         steps = [
-            {"title": "Receive Deck Request", "description": "API endpoint receives request to generate a deck", "fileId": entry_files[0] if entry_files else None},
+            {"title": "Receive Deck Request", "description": "API endpoint receives request to generate a deck", "fileId": first_entry},
             {"title": "Load Prospect Data", "description": "Fetch prospect information needed for deck generation", "fileId": "backend/app/models/prospect.py"},
             {"title": "Generate Deck Outline", "description": "Create structure and sections for the presentation deck", "fileId": None},
             {"title": "Populate Deck Content", "description": "Fill deck sections with prospect-specific content using LLM", "fileId": None},
             {"title": "Render to PDF", "description": "Convert the deck content into a PDF document", "fileId": "backend/app/services/pdf.py"},
             {"title": "Generate Slides", "description": "Create slide artifacts for web viewing", "fileId": "backend/app/services/slides.py"},
-            {"title": "Return Deck Artifacts", "description": "Return the generated PDF and slide links", "fileId": entry_files[0] if entry_files else None}
+            {"title": "Return Deck Artifacts", "description": "Return the generated PDF and slide links", "fileId": first_entry}
         ]
     elif is_prospect_flow:
         steps = [
-            {"title": "Receive Prospect Request", "description": "API endpoint receives prospect-related request", "fileId": entry_files[0] if entry_files else None},
+            {"title": "Receive Prospect Request", "description": "API endpoint receives prospect-related request", "fileId": first_entry},
             {"title": "Validate Prospect Data", "description": "Validate the prospect information against schemas", "fileId": "backend/app/models/prospect.py"},
             {"title": "Process Prospect", "description": "Handle prospect creation, update, or retrieval logic", "fileId": None},
             {"title": "Store to Database", "description": "Persist prospect data to the database", "fileId": None},
-            {"title": "Return Prospect Response", "description": "Return the processed prospect information", "fileId": entry_files[0] if entry_files else None}
+            {"title": "Return Prospect Response", "description": "Return the processed prospect information", "fileId": first_entry}
         ]
     elif is_web_app:
         steps = [
-            {"title": "Load Application", "description": "Initialize the Next.js frontend application", "fileId": entry_files[0] if entry_files else None},
+            {"title": "Load Application", "description": "Initialize the Next.js frontend application", "fileId": first_entry},
             {"title": "Render Layout", "description": "Render the main application layout and navigation", "fileId": "offdeal-frontend/src/app/layout.tsx"},
             {"title": "Handle Client Interactions", "description": "Process user interactions and state changes", "fileId": None},
             {"title": "Make API Calls", "description": "Communicate with backend APIs for data", "fileId": "offdeal-frontend/src/lib/api.ts"},
@@ -115,19 +154,19 @@ def build_steps(cap) -> list[dict]:
     elif is_router:
         # Extract the specific router type from the entry point
         router_type = "API"
-        if entry_files and "prospect" in entry_files[0]:
+        if first_entry and "prospect" in first_entry:
             router_type = "Prospect"
-        elif entry_files and "deck" in entry_files[0]:
+        elif first_entry and "deck" in first_entry:
             router_type = "Deck"
-        elif entry_files and "email" in entry_files[0]:
+        elif first_entry and "email" in first_entry:
             router_type = "Email"
         
         steps = [
-            {"title": f"Initialize {router_type} Router", "description": f"Set up FastAPI router for {router_type.lower()} endpoints", "fileId": entry_files[0] if entry_files else None},
-            {"title": "Define Route Handlers", "description": f"Implement HTTP method handlers for {router_type.lower()} operations", "fileId": entry_files[0] if entry_files else None},
+            {"title": f"Initialize {router_type} Router", "description": f"Set up FastAPI router for {router_type.lower()} endpoints", "fileId": first_entry},
+            {"title": "Define Route Handlers", "description": f"Implement HTTP method handlers for {router_type.lower()} operations", "fileId": first_entry},
             {"title": "Validate Request Data", "description": "Validate incoming request data against Pydantic schemas", "fileId": None},
             {"title": "Execute Business Logic", "description": f"Process {router_type.lower()}-specific business operations", "fileId": None},
-            {"title": "Return API Response", "description": "Format and return the appropriate HTTP response", "fileId": entry_files[0] if entry_files else None}
+            {"title": "Return API Response", "description": "Format and return the appropriate HTTP response", "fileId": first_entry}
         ]
     elif is_main_workflow:
         steps = [
@@ -141,45 +180,53 @@ def build_steps(cap) -> list[dict]:
     else:
         # Generic fallback for unknown capability types
         steps = [
-            {"title": "Initialize Component", "description": f"Set up the {cap.get('name', 'component')} functionality", "fileId": entry_files[0] if entry_files else None},
+            {"title": "Initialize Component", "description": f"Set up the {cap.get('name', 'component')} functionality", "fileId": first_entry},
             {"title": "Process Input", "description": "Handle and validate incoming data or requests", "fileId": None},
             {"title": "Execute Logic", "description": "Perform the core processing logic for this capability", "fileId": None},
             {"title": "Generate Output", "description": "Produce the expected output or response", "fileId": None},
-            {"title": "Complete Operation", "description": "Finalize the operation and return results", "fileId": entry_files[0] if entry_files else None}
+            {"title": "Complete Operation", "description": "Finalize the operation and return results", "fileId": first_entry}
         ]
     
     return steps
 
+def _path_stem(path: str) -> str:
+    """``Path(path).stem`` with plain string ops, for "/"-separated repo-relative paths."""
+    name = path.rstrip("/").rsplit("/", 1)[-1]
+    i = name.rfind(".")
+    return name[:i] if 0 < i < len(name) - 1 else name
+
 def ensure_contract_coverage(cap):
     """
     For every path that appears in data_flow.inputs (requestSchema) or data_flow.outputs,
     ensure there's a contracts[] entry with a matching 'path'. If missing, add a synthetic stub.
     """
     df = cap.get("data_flow", {})
-    needed = set()
+    needed = {
+        i["path"] for i in df.get("inputs", [])
+        if i.get("type") == "requestSchema" and i.get("path")
+    }
+    needed.update(o["path"] for o in df.get("outputs", []) if o.get("path"))
 
-    for i in df.get("inputs", []):
-        if i.get("type") == "requestSchema" and i.get("path"):
-            needed.add(i["path"])
+    have = {c.get("path") for c in cap.get("contracts", []) if c.get("path")}
+    # `needed` only holds truthy paths, so a plain set difference suffices
+    missing = sorted(needed - have)
+    if not missing:
+        return
 
-    for o in df.get("outputs", []):
-        p = o.get("path")
-        if p:
-            needed.add(p)
+    cap.setdefault("contracts", []).extend({
+        "name": _path_stem(path) or "contract",
+        "kind": "api.Module",       # generic but acceptable kind
+        "path": path,
+        "fields": []
+    } for path in missing)
 
-    have = {c.get("path") for c in cap.get("contracts", []) if c.get("path")}
-    missing = sorted(p for p in needed if p and p not in have)
-
-    for path in missing:
-        cap.setdefault("contracts", []).append({
-            "name": Path(path).stem or "contract",
-            "kind": "api.Module",       # generic but acceptable kind
-            "path": path,
-            "fields": []
-        })
+def extract_data_flow(repo_root: Path, py_files: Optional[List[Path]] = None,
+                      models: Optional[Dict[str, Any]] = None, routes: Optional[List[Dict]] = None):
+    """Extract data flow information from the repository.
 
-def extract_data_flow(repo_root: Path):
-    """Extract data flow information from the repository."""
+    ``py_files`` is the already walked ``iter_py_files(repo_root)`` list; ``models`` and
+    ``routes`` are already collected Pydantic models / FastAPI routes, if available.
+    """
     project_context = detect_project_context(repo_root)
     
     # Initialize data flow structure
@@ -192,22 +239,41 @@ def extract_data_flow(repo_root: Path):
     
     # Get models and routes based on detected frameworks
     if project_context.get("python"):
-        models = collect_pydantic_models(repo_root)
-        routes = find_fastapi_routes(repo_root)
+        if models is None or routes is None:
+            if py_files is None:
+                py_files = list(iter_py_files(repo_root))
+            # One (cached) read + parse per file yields both models and routes
+            root_len = len(str(repo_root)) + 1
+            file_models: Dict[str, Any] = {}
+            file_routes: List[Dict] = []
+            for f in py_files:
+                extracted = _cached_extract(f, str(f)[root_len:])
+                file_models.update(extracted["models"])
+                file_routes.extend(extracted["routes"])
+            if models is None:
+                models = file_models
+            if routes is None:
+                routes = file_routes
         
         # Link request models
         inputs = []
         for route in routes:
             for param in route.get("params", []):
-                if param.get("type") and "BaseModel" in str(param.get("type")):
-                    model_name = str(param.get("type")).split("'")[1] if "'" in str(param.get("type")) else None
-                    if model_name and model_name in models:
-                        inputs.append({
-                            "type": "requestSchema",
-                            "name": model_name,
-                            "path": models[model_name].get("file"),
-                            "fields": models[model_name].get("fields", [])
-                        })
+                param_type = param.get("type")
+                if not param_type:
+                    continue
+                type_str = param_type if isinstance(param_type, str) else str(param_type)
+                if "BaseModel" not in type_str:
+                    continue
+                match = _QUOTED_NAME_RE.search(type_str)
+                model_name = match.group(1) if match else None
+                if model_name and model_name in models:
+                    inputs.append({
+                        "type": "requestSchema",
+                        "name": model_name,
+                        "path": models[model_name].get("file"),
+                        "fields": models[model_name].get("fields", [])
+                    })
         
         # Add synthetic request schemas if none found
         if not any(i.get("type") == "requestSchema" for i in inputs):
@@ -272,33 +338,24 @@ def extract_data_flow(repo_root: Path):
     
     return data_flow
 
+# Repo-independent edges appended to every control flow, as (from, to, type)
+_GENERIC_CONTROL_FLOW = (
+    ("main.py", "services/pdf.py", "call"),
+    ("main.py", "models/deck.py", "call"),
+)
+
 def build_control_flow(repo_root: Path, routes: List[Dict]) -> List[Dict]:
     """Build control flow edges from routes and dependencies."""
-    control_flow = []
-    
-    # Add route-to-handler edges
-    for route in routes:
-        control_flow.append({
-            "from": route.get("file", ""),
-            "to": route.get("handler", ""),
-            "type": "route"
-        })
+    # Add route-to-handler edges (extracted routes name their handler "func"); a handler
+    # behind several decorators (e.g. GET and HEAD) yields the same edge, so emit each once
+    edges = dict.fromkeys(
+        (route.get("file", ""), route.get("func", ""), "route") for route in routes
+    )
     
     # Add generic control flow
-    control_flow.extend([
-        {
-            "from": "main.py",
-            "to": "services/pdf.py",
-            "type": "call"
-        },
-        {
-            "from": "main.py", 
-            "to": "models/deck.py",
-            "type": "call"
-        }
-    ])
+    edges.update(dict.fromkeys(_GENERIC_CONTROL_FLOW))
     
-    return control_flow
+    return [{"from": src, "to": dst, "type": kind} for src, dst, kind in edges]
 
 def build_policies(repo_root: Path) -> List[Dict]:
     """Build security and operational policies."""
@@ -318,18 +375,44 @@ def build_policies(repo_root: Path) -> List[Dict]:
 
 def build_contracts(models: Dict, data_flow: Dict, repo_root: Path) -> List[Dict]:
     """Build API contracts from models and data flow."""
-    contracts = []
-    
-    # Add contracts for all models
-    for model_name, model_info in models.items():
-        contracts.append({
+    # One contract per model; model names are dict keys, so no duplicate checks are needed
+    return [
+        {
             "name": model_name,
             "kind": "pydantic.Model",
             "path": model_info.get("file", ""),
             "fields": model_info.get("fields", [])
-        })
-    
-    return contracts
+        }
+        for model_name, model_info in models.items()
+    ]
+
+@lru_cache(maxsize=None)
+def _dir_index(directory: Path) -> frozenset:
+    """Names of the files directly inside ``directory`` (one scandir per directory)."""
+    try:
+        with os.scandir(directory) as it:
+            return frozenset(e.name for e in it if e.is_file())
+    except OSError:
+        return frozenset()
+
+@lru_cache(maxsize=None)
+def _rglob_index(directory: Path, pattern: str) -> Tuple[Path, ...]:
+    """Memoized ``directory.rglob(pattern)``; cleared with _dir_index at the start of each build."""
+    return tuple(directory.rglob(pattern))
+
+def _page_files_under(directory: Path, pages_dir: Path) -> List[Path]:
+    """
+    ``*.page.ts`` files below ``directory``. Directories inside ``pages_dir`` are sliced
+    out of its single (memoized) walk instead of being walked again.
+    """
+    if directory == pages_dir or pages_dir in directory.parents:
+        prefix = str(directory) + os.sep
+        return [p for p in _rglob_index(pages_dir, "*.page.ts") if str(p).startswith(prefix)]
+    return list(_rglob_index(directory, "*.page.ts"))
+
+def _has_file(path: Path) -> bool:
+    """Existence check for a file served from the cached directory listing."""
+    return path.name in _dir_index(path.parent)
 
 def _get_source_root(repo_dir: Path) -> Path:
     """Return the real source root inside snapshot (first top-level folder if present)."""
@@ -345,15 +428,211 @@ def _get_source_root(repo_dir: Path) -> Path:
         pass
     return snap
 
-def build_capability(repo_dir: Path) -> Dict[str, Any]:
-    """Build a complete capability from repository analysis."""
+# Bump when the shape of extract_models_and_routes() output changes
+_EXTRACT_CACHE_VERSION = 1
+
+def _parse_cache_dir(repo_dir: Path) -> Optional[Path]:
+    """
+    On-disk parse cache for a repo: ``<repo_dir>/cache_parse``, next to cache_llm, so it
+    is removed with the repo. Only used when the upload lives under ``snapshot/``: the
+    cache is unpickled, so it must sit in a directory the app alone writes to.
+    """
+    if not settings.PARSE_CACHE or not (repo_dir / "snapshot").is_dir():
+        return None
+    return repo_dir / "cache_parse"
+
+def _cached_extract(f: Path, rel_path: str, st: Optional[os.stat_result] = None,
+                    cache_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    extract_models_and_routes() memoized in-process, and on disk under ``cache_dir`` if
+    given, keyed by the file's path, mtime and size, so unchanged files skip reading and
+    AST parsing entirely. Pass ``st`` when the caller already has the file's stat (e.g.
+    from scan_source_files). The returned dict is shared between callers and must be treated
+    as read-only.
+    """
+    if st is None:
+        try:
+            st = f.stat()
+        except OSError:
+            return extract_models_and_routes(f, rel_path)
+    return _extract_file_once(str(f), rel_path, st.st_mtime_ns, st.st_size,
+                              str(cache_dir) if cache_dir is not None else None)
+
+@lru_cache(maxsize=4096)
+def _extract_file_once(path_str: str, rel_path: str, mtime_ns: int, size: int,
+                       cache_dir_str: Optional[str] = None) -> Dict[str, Any]:
+    """In-process layer of _cached_extract; stat fields in the key invalidate edited files."""
+    f = Path(path_str)
+    if cache_dir_str is None:
+        return extract_models_and_routes(f, rel_path)
+
+    key = hashlib.sha1(
+        f"{_EXTRACT_CACHE_VERSION}\0{path_str}\0{rel_path}\0{mtime_ns}\0{size}".encode()
+    ).hexdigest()
+    cache_dir = Path(cache_dir_str)
+    cache_file = cache_dir / f"{key}.pkl"
+    try:
+        with cache_file.open("rb") as fh:
+            return pickle.load(fh)
+    except Exception:
+        pass
+
+    extracted = extract_models_and_routes(f, rel_path)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("wb", delete=False, dir=cache_dir, prefix=".tmp_", suffix=".pkl") as tmp:
+            pickle.dump(extracted, tmp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp.name, cache_file)
+    except Exception:
+        # The cache is an optimization only
+        pass
+    return extracted
+
+# Process pool for _extract_all, created on first use and reused across builds
+_parse_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+_parse_pool_workers = 0
+_parse_pool_lock = threading.Lock()
+
+def _get_parse_pool(workers: int) -> concurrent.futures.ProcessPoolExecutor:
+    """Return the shared parse pool, (re)creating it if missing or sized differently."""
+    global _parse_pool, _parse_pool_workers
+    with _parse_pool_lock:
+        if _parse_pool is None or _parse_pool_workers != workers:
+            if _parse_pool is not None:
+                _parse_pool.shutdown(wait=False)
+            # Spawn, not fork: this runs on an executor thread of the (multi-threaded)
+            # server process, and forking that can deadlock the children
+            _parse_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _parse_pool_workers = workers
+        return _parse_pool
+
+def _discard_parse_pool() -> None:
+    """Drop a broken parse pool so the next large build starts a fresh one."""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=False)
+        _parse_pool = None
+
+def _extract_all(py_scan: List[Tuple[Path, str, os.stat_result]],
+                 cache_dir: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """
+    _cached_extract() over every scanned file, in order. Large repos fan the AST parsing
+    out to a long-lived process pool (workers still share the on-disk cache); small ones
+    stay serial since dispatch overhead would dominate.
+    """
+    cache_dir_str = str(cache_dir) if cache_dir is not None else None
+    if settings.PY_PARSE_WORKERS > 1 and len(py_scan) >= settings.PY_PARSE_PARALLEL_MIN_FILES:
+        try:
+            pool = _get_parse_pool(settings.PY_PARSE_WORKERS)
+            return list(pool.map(
+                _extract_file_once,
+                [str(f) for f, _, _ in py_scan],
+                [rel_path for _, rel_path, _ in py_scan],
+                [st.st_mtime_ns for _, _, st in py_scan],
+                [st.st_size for _, _, st in py_scan],
+                [cache_dir_str] * len(py_scan),
+                chunksize=32,
+            ))
+        except (OSError, concurrent.futures.BrokenExecutor):
+            _discard_parse_pool()
+    return [_cached_extract(f, rel_path, st, cache_dir) for f, rel_path, st in py_scan]
+
+# Directories that never feed capability extraction
+_FINGERPRINT_SKIP_DIRS = {".git", "__pycache__"}
+# Directories the app itself writes at the top of repo_dir
+_APP_OUTPUT_DIRS = frozenset({"capabilities", "cache_parse", "cache_llm"})
+_MANIFEST_NAMES = ("package.json", "requirements.txt")
+# repo_dir -> (fingerprint, capability built with data_flow=None); a few repos at most
+_BUILD_CACHE: Dict[str, Tuple[bytes, Dict[str, Any]]] = {}
+# Builds run on executor threads; guards _BUILD_CACHE lookups and evictions
+_build_cache_lock = threading.Lock()
+_BUILD_CACHE_SIZE = 8
+
+def _repo_fingerprint(repo_dir: Path, source_root: Path) -> bytes:
+    """
+    Digest of (path, mtime, size) over everything build_capability reads: all files
+    under source_root, source files elsewhere in repo_dir, and the parent manifests
+    that detect_project_context falls back to. The app's own output (capabilities/,
+    cache_parse/, cache_llm/) is excluded.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    root, src = str(repo_dir), str(source_root)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(
+            d for d in dirnames
+            if d not in _FINGERPRINT_SKIP_DIRS and not (dirpath == root and d in _APP_OUTPUT_DIRS)
+        )
+        in_source = dirpath == src or dirpath.startswith(src + os.sep)
+        for name in sorted(filenames):
+            if (not in_source and name not in _MANIFEST_NAMES
+                    and os.path.splitext(name)[1].lower() not in _SOURCE_EXTENSIONS):
+                continue
+            try:
+                st = os.stat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            h.update(f"{dirpath}/{name}\0{st.st_mtime_ns}\0{st.st_size}\n".encode())
+    for name in _MANIFEST_NAMES:
+        try:
+            st = (source_root.parent / name).stat()
+        except OSError:
+            continue
+        h.update(f"{name}\0{st.st_mtime_ns}\0{st.st_size}\n".encode())
+    return h.digest()
+
+def build_capability(repo_dir: Path, data_flow: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Build a complete capability from repository analysis.
+
+    Pass ``data_flow`` to reuse an already extracted (repo-wide) data flow.
+    Results are memoized per repo and reused while its fingerprint is unchanged;
+    callers always get their own copy to mutate.
+    """
+    key = str(repo_dir)
+    fingerprint = _repo_fingerprint(repo_dir, _get_source_root(repo_dir))
+    with _build_cache_lock:
+        cached = _BUILD_CACHE.get(key)
+    if cached is not None and cached[0] == fingerprint:
+        cap = cached[1]
+        if data_flow is None or data_flow == cap["data_flow"]:
+            # Keep sharing the caller's data_flow by reference, as an uncached build would
+            return {
+                k: data_flow if k == "data_flow" and data_flow is not None else copy.deepcopy(v)
+                for k, v in cap.items()
+            }
+
+    capability = _build_capability_uncached(repo_dir, data_flow)
+    if data_flow is None:
+        entry = (fingerprint, copy.deepcopy(capability))
+        with _build_cache_lock:
+            _BUILD_CACHE.pop(key, None)
+            while len(_BUILD_CACHE) >= _BUILD_CACHE_SIZE:
+                _BUILD_CACHE.pop(next(iter(_BUILD_CACHE)))
+            _BUILD_CACHE[key] = entry
+    return capability
+
+def _build_capability_uncached(repo_dir: Path, data_flow: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """build_capability() without the fingerprint cache."""
     source_root = _get_source_root(repo_dir)
     project_context = detect_project_context(source_root)
     
+    # Walk the source tree once and share the listings with every pass below
+    source_files, py_scan = scan_source_files(source_root)
+    if not project_context.get("python"):
+        py_scan = []
+    py_files = [f for f, _, _ in py_scan]
+    # Models and routes come from one (cached) read + parse per Python file
+    models: Dict[str, Any] = {}
+    routes: List[Dict] = []
+    for extracted in _extract_all(py_scan, _parse_cache_dir(repo_dir)):
+        models.update(extracted["models"])
+        routes.extend(extracted["routes"])
+    
     # Get entrypoints based on detected frameworks
     entrypoints = []
     if project_context.get("python"):
-        routes = find_fastapi_routes(source_root)
         for route in routes:
             entrypoints.append({
                 "path": route.get("file", ""),
@@ -373,25 +652,32 @@ def build_capability(repo_dir: Path) -> Dict[str, Any]:
         ]
     
     # Build data flow
-    data_flow = extract_data_flow(source_root)
+    if data_flow is None:
+        data_flow = extract_data_flow(source_root, py_files, models, routes)
     
     # Build control flow
-    routes = find_fastapi_routes(source_root) if project_context.get("python") else []
     control_flow = build_control_flow(source_root, routes)
     
-    # Build swimlanes
+    # Build swimlanes and node index in a single classification pass
     swimlanes = {"web": [], "api": [], "workers": [], "other": []}
-    for f in iter_all_source_files(source_root):
-        rel_path = str(f.relative_to(source_root))
-        lane = lane_for_path(rel_path)
+    node_index = {}
+    root_len = len(str(source_root)) + 1
+    for f in source_files:
+        rel_path = str(f)[root_len:]
+        lane, node_lane, role = _classify_file(rel_path)
         swimlanes[lane].append(rel_path)
+        node_index[rel_path] = {
+            "lane": node_lane,
+            "role": role,
+            "incoming": _NO_EDGES,
+            "outgoing": _NO_EDGES
+        }
     
     # Build orchestrators
     orchestrators = compute_orchestrators({"entrypoints": entrypoints}, repo_dir)
     
     # Build policies and contracts
     policies = build_policies(repo_dir)
-    models = collect_pydantic_models(repo_dir) if project_context.get("python") else {}
     contracts = build_contracts(models, data_flow, repo_dir)
     
     # Build steps
@@ -400,31 +686,7 @@ def build_capability(repo_dir: Path) -> Dict[str, Any]:
         "data_flow": data_flow
     })
     
-    # Build node index
-    node_index = {}
-    for f in iter_all_source_files(source_root):
-        rel_path = str(f.relative_to(source_root))
-        lane = lane_for_path(rel_path)
-        
-        # Determine role based on file type and location
-        role = "service"
-        if any(main in rel_path for main in ["main.py", "app.py", "index.js", "server.js"]):                      
-            role = "entrypoint"
-        elif any(router in rel_path for router in ["routers/", "routes/", "api/", "pages/api/", "app/api/"]):     
-            role = "entrypoint"
-            lane = "api"
-            
-        node_index[rel_path] = {
-            "lane": lane,
-            "role": role,
-            "incoming": [],
-            "outgoing": []
-        }
-    
-    # Deduplicate dataOut
-    data_out = list(set([
-        "IngestResponse", "RepoOverviewModel", "StatusPayload", "OpenAI", "SMTP", "Database"
-    ]))
+    data_out = list(_DATA_OUT)
     
     # Build final capability
     capability = {
@@ -444,7 +706,7 @@ def build_capability(repo_dir: Path) -> Dict[str, Any]:
         "nodeIndex": node_index,
         "dataOut": data_out,
         "debug": {
-            "files_processed": len(list(iter_all_source_files(repo_dir))),
+            "files_processed": len(source_files) if source_root == repo_dir else sum(1 for _ in iter_all_source_files(repo_dir)),
             "entrypoints_found": len(entrypoints),
             "models_found": len(data_flow["stores"]),
             "externals_found": len(data_flow["externals"]),
@@ -468,21 +730,32 @@ def build_capability(repo_dir: Path) -> Dict[str, Any]:
 def write_capability(repo_dir: Path, capability: Dict[str, Any]) -> None:
     """Write capability.json to disk."""
     capability_id = capability.get("id", "cap_main_workflow")
-    output_dir = repo_dir / "capabilities" / capability_id
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    output_file = output_dir / "capability.json"
+    # write_json_atomic creates the directory and serializes with orjson when available
+    output_file = repo_dir / "capabilities" / capability_id / "capability.json"
     write_json_atomic(output_file, capability)
     
     print(f"✅ Capability written to {output_file}")
 
+# Angular page-area folders that never become their own capability
+_SPECIAL_PAGE_GROUPS = frozenset({"(home)", "(auth)"})
+# Page areas already covered by the domain-specific capabilities
+_DOMAIN_PAGE_AREAS = frozenset({"domains", "monitor", "stats", "notifications"})
+_STRIP_BRACKETS = str.maketrans("", "", "[]")
+
 # Functions required by main.py
 async def build_all_capabilities(repo_dir: Path) -> List[str]:
     """Build multiple heuristic capabilities and persist an index."""
     capabilities: List[Dict[str, Any]] = []
+    cap_ids: set = set()  # ids already in `capabilities`, for O(1) duplicate checks
+    # Directory listings are only trusted for the duration of one build
+    _dir_index.cache_clear()
+    _rglob_index.cache_clear()
 
-    # Baseline capability
-    main_cap = build_capability(repo_dir)
+    # Baseline capability (CPU-bound analysis runs off the event loop)
+    loop = asyncio.get_running_loop()
+    main_cap = await loop.run_in_executor(None, build_capability, repo_dir)
+    # data_flow is repo-wide; every other capability shares it by reference
+    shared_data_flow = main_cap["data_flow"]
     main_cap["id"] = "cap_main_workflow"
     main_cap["name"] = "Main Application Workflow"
     main_cap["purpose"] = "Primary application functionality and data processing"
@@ -495,19 +768,31 @@ async def build_all_capabilities(repo_dir: Path) -> List[str]:
         "data_flow": main_cap.get("data_flow", {})
     })
     
-    write_capability(repo_dir, main_cap)
     capabilities.append(main_cap)
+    cap_ids.add(main_cap["id"])
+
+    # Every other capability starts from the same build over the shared data_flow.
+    # Build it once off the event loop and hand out copies, instead of one
+    # synchronous build_capability() (and repo fingerprint walk) per capability.
+    base_cap = await loop.run_in_executor(None, build_capability, repo_dir, shared_data_flow)
+
+    def new_capability() -> Dict[str, Any]:
+        return {k: v if k == "data_flow" else copy.deepcopy(v) for k, v in base_cap.items()}
 
     # Router-based capabilities (if files exist)
     source_root = _get_source_root(repo_dir)
+    pages_dir = source_root / "src/app/pages"
+    # Paths below are rooted at these directories: slice strings instead of relative_to()
+    source_root_len = len(str(source_root)) + 1
+    pages_dir_len = len(str(pages_dir)) + 1
     router_specs = [
         ("cap_deck_flow", "Deck Generation Flow", "backend/app/routers/deck.py", "fastapi"),
         ("cap_email_flow", "Email Generation Flow", "backend/app/routers/email.py", "fastapi"),
         ("cap_prospect_flow", "Prospect API Flow", "backend/app/routers/prospect.py", "fastapi"),
     ]
     for cap_id, cap_name, entry_path, fw in router_specs:
-        if (source_root / entry_path).exists():
-            cap = build_capability(repo_dir)
+        if _has_file(source_root / entry_path):
+            cap = new_capability()
             cap["id"] = cap_id
             cap["name"] = cap_name
             cap["purpose"] = cap_name
@@ -527,12 +812,12 @@ async def build_all_capabilities(repo_dir: Path) -> List[str]:
                 "data_flow": cap.get("data_flow", {})
             })
             
-            write_capability(repo_dir, cap)
             capabilities.append(cap)
+            cap_ids.add(cap["id"])
 
     # Frontend capability (Next.js)
-    if (source_root / "offdeal-frontend/src/app/page.tsx").exists():
-        cap = build_capability(repo_dir)
+    if _has_file(source_root / "offdeal-frontend/src/app/page.tsx"):
+        cap = new_capability()
         cap["id"] = "cap_web_app"
         cap["name"] = "Web Application"
         cap["purpose"] = "Next.js frontend application"
@@ -551,11 +836,12 @@ async def build_all_capabilities(repo_dir: Path) -> List[str]:
             "data_flow": cap.get("data_flow", {})
         })
         
-        write_capability(repo_dir, cap)
         capabilities.append(cap)
+        cap_ids.add(cap["id"])
 
     # Domain-specific capabilities for domain management applications
-    if "domain" in str(source_root).lower() or "domain" in str(repo_dir).lower():
+    source_root_is_domain = "domain" in str(source_root).lower()
+    if source_root_is_domain or "domain" in str(repo_dir).lower():
         # Domain Management Capabilities
         domain_capabilities = [
             {
@@ -615,7 +901,7 @@ async def build_all_capabilities(repo_dir: Path) -> List[str]:
         ]
         
         for cap_spec in domain_capabilities:
-            cap = build_capability(repo_dir)
+            cap = new_capability()
             cap["id"] = cap_spec["id"]
             cap["name"] = cap_spec["name"] 
             cap["purpose"] = cap_spec["purpose"]
@@ -627,8 +913,8 @@ async def build_all_capabilities(repo_dir: Path) -> List[str]:
                 if ep_path.exists():
                     if ep_path.is_dir():
                         # Find page files in directory
-                        for page_file in ep_path.rglob("*.page.ts"):
-                            rel_path = str(page_file.relative_to(source_root))
+                        for page_file in _page_files_under(ep_path, pages_dir):
+                            rel_path = str(page_file)[source_root_len:]
                             entrypoints.append({
                                 "path": rel_path,
                                 "route": f"/{rel_path.replace('.page.ts', '')}",
@@ -658,44 +944,39 @@ async def build_all_capabilities(repo_dir: Path) -> List[str]:
                 "data_flow": cap.get("data_flow", {})
             })
             
-            write_capability(repo_dir, cap)
             capabilities.append(cap)
+            cap_ids.add(cap["id"])
 
     # Angular capabilities: one capability per major page/section (fallback for non-domain apps)
     try:
-        pages_dir = source_root / "src/app/pages"
         if pages_dir.exists():
             # Group Angular pages by functional area
             page_groups = {}
-            for page_file in pages_dir.rglob("*.page.ts"):
-                rel_path = str(page_file.relative_to(source_root))
+            for page_file in _page_files_under(pages_dir, pages_dir):
+                page_str = str(page_file)
                 # Extract functional area from path (e.g., domains, monitor, settings)
-                path_parts = page_file.relative_to(pages_dir).parts
-                if len(path_parts) > 0:
-                    functional_area = path_parts[0]
-                    if functional_area not in page_groups:
-                        page_groups[functional_area] = []
-                    page_groups[functional_area].append(rel_path)
+                functional_area = page_str[pages_dir_len:].split(os.sep, 1)[0]
+                page_groups.setdefault(functional_area, []).append(page_str[source_root_len:])
             
             # Create capabilities for each functional area
             for area, page_files in page_groups.items():
-                if area in ['(home)', '(auth)']:  # Skip special Angular routing folders
+                if area in _SPECIAL_PAGE_GROUPS:  # Skip special Angular routing folders
                     continue
                 
                 # Skip if we already created domain-specific capabilities
-                if "domain" in str(source_root).lower() and area in ['domains', 'monitor', 'stats', 'notifications']:
+                if source_root_is_domain and area in _DOMAIN_PAGE_AREAS:
                     continue
                 
                 # Clean up area name for capability ID
-                clean_area = area.replace('[', '').replace(']', '').replace('...', '').replace('.page.ts', '').replace('.', '_')
-                if not clean_area or clean_area in ['not-found']:
+                clean_area = area.translate(_STRIP_BRACKETS).replace('...', '').replace('.page.ts', '').replace('.', '_')
+                if not clean_area or clean_area == 'not-found':
                     continue
                     
                 cap_id = f"cap_{clean_area}"
-                if any(c.get("id") == cap_id for c in capabilities):
+                if cap_id in cap_ids:
                     continue
                     
-                cap = build_capability(repo_dir)
+                cap = new_capability()
                 cap["id"] = cap_id
                 cap["name"] = f"{area.title()} Management"
                 cap["purpose"] = f"Manages {area} related functionality and user interactions"
@@ -715,44 +996,44 @@ async def build_all_capabilities(repo_dir: Path) -> List[str]:
                     "data_flow": cap.get("data_flow", {})
                 })
                 
-                write_capability(repo_dir, cap)
                 capabilities.append(cap)
+                cap_ids.add(cap["id"])
     except Exception as e:
         print(f"Warning: Could not process Angular pages: {e}")
 
     # Generic: one capability per FastAPI router and per Next.js route
     try:
         routers_dir = source_root / "backend/app/routers"
-        if routers_dir.exists():
-            for py in routers_dir.glob("*.py"):
-                if py.name == "__init__.py":
-                    continue
-                rel_path = str(py.relative_to(source_root))
-                cap_id = f"cap_router_{py.stem}"
-                if any(c.get("id") == cap_id for c in capabilities):
-                    continue
-                cap = build_capability(repo_dir)
-                cap["id"] = cap_id
-                cap["name"] = f"Router: {py.stem}"
-                cap["purpose"] = f"API flow for {py.stem}"
-                cap["entrypoints"] = [{
-                    "path": rel_path,
-                    "route": "/",
-                    "method": "GET",
-                    "framework": "fastapi",
-                }]
-                cap["orchestrators"] = compute_orchestrators({"entrypoints": cap["entrypoints"]}, repo_dir)
-                
-                # Rebuild steps with proper capability context
-                cap["steps"] = build_steps({
-                    "name": f"Router: {py.stem}",
-                    "purpose": f"API flow for {py.stem}",
-                    "entrypoints": cap["entrypoints"],
-                    "data_flow": cap.get("data_flow", {})
-                })
-                
-                write_capability(repo_dir, cap)
-                capabilities.append(cap)
+        router_names = sorted(
+            n for n in _dir_index(routers_dir) if n.endswith(".py") and n != "__init__.py"
+        )
+        for py in (routers_dir / n for n in router_names):
+            rel_path = str(py.relative_to(source_root))
+            cap_id = f"cap_router_{py.stem}"
+            if cap_id in cap_ids:
+                continue
+            cap = new_capability()
+            cap["id"] = cap_id
+            cap["name"] = f"Router: {py.stem}"
+            cap["purpose"] = f"API flow for {py.stem}"
+            cap["entrypoints"] = [{
+                "path": rel_path,
+                "route": "/",
+                "method": "GET",
+                "framework": "fastapi",
+            }]
+            cap["orchestrators"] = compute_orchestrators({"entrypoints": cap["entrypoints"]}, repo_dir)
+            
+            # Rebuild steps with proper capability context
+            cap["steps"] = build_steps({
+                "name": f"Router: {py.stem}",
+                "purpose": f"API flow for {py.stem}",
+                "entrypoints": cap["entrypoints"],
+                "data_flow": cap.get("data_flow", {})
+            })
+            
+            capabilities.append(cap)
+            cap_ids.add(cap["id"])
     except Exception:
         pass
 
@@ -763,9 +1044,9 @@ async def build_all_capabilities(repo_dir: Path) -> List[str]:
                 rel = str(route_file.relative_to(source_root))
                 seg = route_file.parent.name
                 cap_id = f"cap_web_route_{seg}"
-                if any(c.get("id") == cap_id for c in capabilities):
+                if cap_id in cap_ids:
                     continue
-                cap = build_capability(repo_dir)
+                cap = new_capability()
                 cap["id"] = cap_id
                 cap["name"] = f"Web Route: {seg}"
                 cap["purpose"] = f"Next.js route at /{seg}"
@@ -775,8 +1056,8 @@ async def build_all_capabilities(repo_dir: Path) -> List[str]:
                     "method": "GET",
                     "framework": "nextjs",
                 }]
-                write_capability(repo_dir, cap)
                 capabilities.append(cap)
+                cap_ids.add(cap["id"])
     except Exception:
         pass
 
@@ -803,10 +1084,8 @@ async def build_all_capabilities(repo_dir: Path) -> List[str]:
             for svc in ("backend/app/services/pdf.py", "backend/app/services/slides.py"):
                 if svc not in sinks:
                     sinks.append(svc)
-            # Make dataOut more descriptive
-            dout = set(cap.get("dataOut", []) or [])
-            dout.update({"PDF", "Slides"})
-            cap["dataOut"] = list(dout)
+            # Make dataOut more descriptive (ordered dedupe keeps output stable)
+            cap["dataOut"] = list(dict.fromkeys([*(cap.get("dataOut", []) or []), "PDF", "Slides"]))
         if any("routers/prospect.py" in p for p in eps):
             if "Request: Prospect" not in data_in:
                 data_in.append("Request: Prospect")
@@ -817,25 +1096,24 @@ async def build_all_capabilities(repo_dir: Path) -> List[str]:
         if any(p.startswith("offdeal-frontend/") for p in eps):
             # Frontend tends to source from its API lib
             api_lib = "offdeal-frontend/src/lib/api.ts"
-            if (source_root / api_lib).exists() and api_lib not in sources:
+            if _has_file(source_root / api_lib) and api_lib not in sources:
                 sources.append(api_lib)
         cap["dataIn"] = data_in
         cap["sources"] = sources
         cap["sinks"] = sinks
 
-    # Write individual capability files
+    # Write individual capability files and the index concurrently
+    pending_writes = []
     for cap in capabilities:
         cap_id = cap.get("id", "cap")
-        cap_dir = repo_dir / "capabilities" / cap_id
-        cap_dir.mkdir(parents=True, exist_ok=True)
-        cap_file = cap_dir / "capability.json"
-        write_json_atomic(cap_file, cap)
+        cap_file = repo_dir / "capabilities" / cap_id / "capability.json"
+        pending_writes.append(write_json_atomic_async(cap_file, cap))
 
-    # Write index with just the IDs
+    # Index with just the IDs
     index_ids = [c.get("id", "cap") for c in capabilities]
     index_path = repo_dir / "capabilities" / "index.json"
-    index_path.parent.mkdir(parents=True, exist_ok=True)
-    write_json_atomic(index_path, {"index": index_ids})
+    pending_writes.append(write_json_atomic_async(index_path, {"index": index_ids}))
+    await asyncio.gather(*pending_writes)
 
     return index_ids
 
@@ -843,7 +1121,7 @@ def list_capabilities_index(repo_dir: Path) -> List[Dict[str, Any]]:
     """List capabilities index."""
     index_file = repo_dir / "capabilities" / "index.json"
     if index_file.exists():
-        data = json.loads(index_file.read_text())
+        data = read_json(index_file)
         return data.get("index", [])
     else:
         # Generate default capability if none exists
@@ -862,12 +1140,22 @@ def list_capabilities_index(repo_dir: Path) -> List[Dict[str, Any]]:
         }]
 
 def read_capability_by_id(repo_dir: Path, cap_id: str) -> Dict[str, Any]:
-    """Read a specific capability by ID."""
+    """Read a specific capability by ID.
+
+    File bytes are cached by mtime and size, but each call parses a fresh dict
+    since API handlers mutate the result.
+    """
     capability_file = repo_dir / "capabilities" / cap_id / "capability.json"
-    if capability_file.exists():
-        return json.loads(capability_file.read_text())
-    else:
-        raise FileNotFoundError(f"Capability {cap_id} not found")
+    try:
+        st = capability_file.stat()
+    except OSError:
+        raise FileNotFoundError(f"Capability {cap_id} not found") from None
+    return loads_json(_read_bytes_once(str(capability_file), st.st_mtime_ns, st.st_size))
+
+@lru_cache(maxsize=256)
+def _read_bytes_once(path_str: str, mtime_ns: int, size: int) -> bytes:
+    """Cached read for read_capability_by_id; stat fields in the key invalidate rewritten files."""
+    return Path(path_str).read_bytes()
 
 # Main execution
 if __name__ == "__main__":
@@ -37,9 +37,14 @@ class Settings:
     BIG_FILE_LINES_THRESHOLD: int = int(os.getenv("BIG_FILE_LINES_THRESHOLD", "5000"))
     PARSE_BATCH_SIZE: int = int(os.getenv("PARSE_BATCH_SIZE", "250"))
     PARSE_SHARD_SIZE: int = int(os.getenv("PARSE_SHARD_SIZE", "100"))
+    # Per-repo on-disk parse cache (<repo_dir>/cache_parse), removed with the repo
+    PARSE_CACHE: bool = _bool("PARSE_CACHE", True)
     
     # Concurrency and limits
     NODE_PARSE_CONCURRENCY: int = int(os.getenv("NODE_PARSE_CONCURRENCY", "4"))
+    # Opt-in: >1 starts that many resident parse processes in the serving process
+    PY_PARSE_WORKERS: int = int(os.getenv("PY_PARSE_WORKERS", "1"))
+    PY_PARSE_PARALLEL_MIN_FILES: int = int(os.getenv("PY_PARSE_PARALLEL_MIN_FILES", "50"))
     LLM_CONCURRENCY: int = int(os.getenv("LLM_CONCURRENCY", "4"))
     
     # Degradation toggles
@@ -85,6 +85,20 @@ class NextJSDetector:
         
         return DetectorResult([], 0.0, False, None, [])
     
+    def _route_from_parts(self, route_parts: Tuple[str, ...], skip: Optional[str] = None) -> str:
+        """Join file path parts into route segments, dropping extensions and the `skip` segment."""
+        segments = []
+        for part in route_parts:
+            if part.endswith(('.ts', '.tsx', '.js', '.jsx')):
+                part = part.rsplit('.', 1)[0]
+            if part == skip:
+                continue
+            if part[:1] == "[":
+                # Dynamic segment
+                part = f"[{part[1:-1]}]"
+            segments.append(part)
+        return "/".join(segments)
+    
     def _detect_app_routes(self, file_path: Path, content: str) -> List[Dict[str, Any]]:
         """Detect App Router routes."""
         routes = []
@@ -96,20 +110,7 @@ class NextJSDetector:
             route_parts = path_parts[app_idx + 1:]
             
             # Remove file extensions and handle dynamic segments
-            route_path = "/"
-            for part in route_parts:
-                if part.endswith(('.ts', '.tsx', '.js', '.jsx')):
-                    part = part.rsplit('.', 1)[0]
-                
-                if part == "page":
-                    continue
-                elif part.startswith("["):
-                    # Dynamic segment
-                    route_path += f"[{part[1:-1]}]/"
-                else:
-                    route_path += f"{part}/"
-            
-            route_path = route_path.rstrip("/") or "/"
+            route_path = ("/" + self._route_from_parts(route_parts, skip="page")).rstrip("/") or "/"
             
             # Detect HTTP methods from content
             methods = self._extract_http_methods(content)
@@ -139,20 +140,7 @@ class NextJSDetector:
             route_parts = path_parts[pages_idx + 1:]
             
             # Build route path
-            route_path = "/"
-            for part in route_parts:
-                if part.endswith(('.ts', '.tsx', '.js', '.jsx')):
-                    part = part.rsplit('.', 1)[0]
-                
-                if part == "index":
-                    continue
-                elif part.startswith("["):
-                    # Dynamic segment
-                    route_path += f"[{part[1:-1]}]/"
-                else:
-                    route_path += f"{part}/"
-            
-            route_path = route_path.rstrip("/") or "/"
+            route_path = ("/" + self._route_from_parts(route_parts, skip="index")).rstrip("/") or "/"
             
             # Default to GET for pages
             routes.append({
@@ -180,18 +168,7 @@ class NextJSDetector:
             route_parts = path_parts[api_idx + 1:]
             
             # Build API route path
-            route_path = "/api/"
-            for part in route_parts:
-                if part.endswith(('.ts', '.tsx', '.js', '.jsx')):
-                    part = part.rsplit('.', 1)[0]
-                
-                if part.startswith("["):
-                    # Dynamic segment
-                    route_path += f"[{part[1:-1]}]/"
-                else:
-                    route_path += f"{part}/"
-            
-            route_path = route_path.rstrip("/")
+            route_path = ("/api/" + self._route_from_parts(route_parts)).rstrip("/")
             
             # Detect HTTP methods from content
             methods = self._extract_http_methods(content)
@@ -1,26 +1,89 @@
 from __future__ import annotations
 import asyncio
+import copy
 import hashlib
 import json
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from app.config import settings
+from app.llm.prompts import FILE_SCHEMA, CAPABILITY_SCHEMA, GLOSSARY_SCHEMA
+from app.utils.io import read_json, write_json_atomic
 from openai import AsyncOpenAI
-from openai import APIError
+from openai import APIError, APIStatusError
 
-class LLMClient:
-    """Async OpenAI client with simple on-disk caching and concurrency."""
 
-    def __init__(self, cache_dir: Path):
+def _is_overloaded(exc: Optional[BaseException]) -> bool:
+    """True for rate-limit (429) and server-side (5xx) API errors."""
+    return isinstance(exc, APIStatusError) and (exc.status_code == 429 or exc.status_code >= 500)
+
+
+# Canonical JSON of the module-level response schemas, serialized once. They live
+# for the whole process, so their ids are never reused; per-request schemas are
+# serialized on each call instead of being retained here.
+_CONST_SCHEMA_JSON: Dict[int, str] = {
+    id(schema): json.dumps(schema, sort_keys=True)
+    for schema in (FILE_SCHEMA, CAPABILITY_SCHEMA, GLOSSARY_SCHEMA)
+}
+
+
+class _AdaptiveLimit:
+    """Concurrency cap for API calls that backs off while the provider is overloaded.
+
+    A 429/5xx response retires its permit (down to one in flight) and each
+    success returns a retired one, up to the configured limit.
+    """
+
+    def __init__(self, limit: int):
+        self.max_limit = max(1, limit)
+        self.limit = self.max_limit
+        self._sem = asyncio.Semaphore(self.max_limit)
+
+    async def __aenter__(self) -> None:
+        await self._sem.acquire()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        # No awaits here, so a cancelled caller can never leak a permit
+        if _is_overloaded(exc) and self.limit > 1:
+            self.limit -= 1  # keep this permit out of circulation
+            return
+        self._sem.release()
+        if exc is None and self.limit < self.max_limit:
+            self.limit += 1
+            self._sem.release()
+
+
+class _Transport:
+    """OpenAI HTTP client, concurrency limit and in-flight requests, bound to one event loop."""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
         if not settings.OPENAI_API_KEY:
             raise RuntimeError("OPENAI_API_KEY is not set")
+        self.loop = loop
         self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.limit = _AdaptiveLimit(settings.LLM_CONCURRENCY)
+        # Cache file -> future for requests currently in flight, so identical
+        # concurrent prompts share one API call instead of racing the disk cache
+        self.inflight: Dict[Path, asyncio.Future] = {}
+
+
+class LLMClient:
+    """Async OpenAI client with simple on-disk caching and concurrency.
+
+    Without a ``transport`` the client owns its HTTP pool and limit; get_llm_client()
+    instead hands out per-repo clients over the running loop's shared transport.
+    """
+
+    def __init__(self, cache_dir: Path, transport: Optional[_Transport] = None):
+        if transport is None:
+            transport = _Transport()
+        self.client = transport.client
         # Expose model for metrics callers
         self.model = settings.LLM_MODEL
         self.cache_dir = cache_dir
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self._sem = asyncio.Semaphore(settings.LLM_CONCURRENCY)
+        self._sem = transport.limit
+        self._inflight = transport.inflight
 
     # ---- cache helpers ----
     def _cache_key(self, model: str, messages: List[Dict[str, Any]], schema: Optional[Dict[str, Any]]) -> str:
@@ -28,7 +91,10 @@ class LLMClient:
         m.update(model.encode())
         m.update(json.dumps(messages, sort_keys=True).encode())
         if schema:
-            m.update(json.dumps(schema, sort_keys=True).encode())
+            text = _CONST_SCHEMA_JSON.get(id(schema))
+            if text is None:
+                text = json.dumps(schema, sort_keys=True)
+            m.update(text.encode())
         return m.hexdigest()
 
     def _cache_path(self, key: str) -> Path:
@@ -37,19 +103,18 @@ class LLMClient:
     async def _read_cache(self, key: str) -> Optional[Dict[str, Any]]:
         if not settings.LLM_CACHE:
             return None
-        p = self._cache_path(key)
-        if p.exists():
-            try:
-                return json.loads(p.read_text(encoding="utf-8"))
-            except Exception:
-                return None
-        return None
+        try:
+            return read_json(self._cache_path(key))
+        except Exception:
+            # Missing or unreadable entries are plain cache misses
+            return None
 
     async def _write_cache(self, key: str, value: Dict[str, Any]) -> None:
         if not settings.LLM_CACHE:
             return
-        p = self._cache_path(key)
-        p.write_text(json.dumps(value, ensure_ascii=False, indent=2), encoding="utf-8")
+        # Atomic so a concurrent reader never sees a half-written entry; compact
+        # because only this client reads it back
+        write_json_atomic(self._cache_path(key), value, indent=False)
 
     # ---- calls ----
     async def acomplete_json(self, messages: List[Dict[str, Any]], schema: Dict[str, Any]) -> Dict[str, Any]:
@@ -60,6 +125,43 @@ class LLMClient:
         if cached is not None:
             return cached
 
+        # Keyed by cache file: the map is shared with clients for other repos
+        inflight_key = self._cache_path(ck)
+        pending = self._inflight.get(inflight_key)
+        if pending is not None:
+            try:
+                shared = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The leading caller was cancelled; issue the request ourselves
+                return await self.acomplete_json(messages, schema)
+            # Callers mutate their result, so followers get their own copy
+            return copy.deepcopy(shared)
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[inflight_key] = fut
+        try:
+            payload = await self._complete(model, messages)
+        except Exception as e:
+            self._inflight.pop(inflight_key, None)
+            fut.set_exception(e)
+            fut.exception()  # mark retrieved in case nobody else was waiting
+            raise
+        except BaseException:
+            self._inflight.pop(inflight_key, None)
+            fut.cancel()
+            raise
+        fut.set_result(payload)
+
+        try:
+            await self._write_cache(ck, payload)
+        finally:
+            # Leave the in-flight map only once the cache holds the result, so an
+            # identical request never misses both and calls the API again
+            self._inflight.pop(inflight_key, None)
+        return payload
+
+    async def _complete(self, model: str, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
         async with self._sem:
             try:
                 res = await asyncio.wait_for(
@@ -98,6 +200,27 @@ class LLMClient:
                         payload = {"_raw": text}
                 else:
                     raise
-
-        await self._write_cache(ck, payload)
         return payload
+
+
+# Event loop id -> the transport every LLMClient on that loop shares. The HTTP
+# pool, limit and in-flight futures are loop-bound, so loops never share one.
+_TRANSPORTS: Dict[int, _Transport] = {}
+
+def get_llm_client(cache_dir: Path) -> LLMClient:
+    """Return an LLMClient for `cache_dir` over the running loop's shared transport."""
+    loop = asyncio.get_running_loop()
+    transport = _TRANSPORTS.get(id(loop))
+    if transport is None or transport.loop is not loop:
+        # Forget transports whose loop finished without close_llm_transport()
+        for k in [k for k, t in _TRANSPORTS.items() if t.loop.is_closed()]:
+            del _TRANSPORTS[k]
+        transport = _Transport(loop)
+        _TRANSPORTS[id(loop)] = transport
+    return LLMClient(cache_dir, transport=transport)
+
+async def close_llm_transport() -> None:
+    """Close the running loop's shared OpenAI client; call before the loop shuts down."""
+    transport = _TRANSPORTS.pop(id(asyncio.get_running_loop()), None)
+    if transport is not None:
+        await transport.client.close()
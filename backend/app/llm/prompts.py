@@ -1,4 +1,5 @@
 from __future__ import annotations
+import json
 import re
 from typing import Any, Dict, List
 
@@ -89,29 +90,50 @@ GLOSSARY_SCHEMA: Dict[str, Any] = {
     "additionalProperties": False,
 }
 
+# Patterns to scrub (case-insensitive), compiled once instead of per call
+_SECRET_PATTERNS = tuple(re.compile(p) for p in (
+    r'(?i)(api[_-]?key|secret|token|password|passwd|pwd)\s*[:=]\s*["\']?[^\s"\']+["\']?',
+    r'(?i)(auth[_-]?token|bearer[_-]?token|access[_-]?token)\s*[:=]\s*["\']?[^\s"\']+["\']?',
+    r'(?i)(private[_-]?key|public[_-]?key)\s*[:=]\s*["\']?[^\s"\']+["\']?',
+    r'(?i)(database[_-]?url|db[_-]?url|connection[_-]?string)\s*[:=]\s*["\']?[^\s"\']+["\']?',
+    r'(?i)(redis[_-]?url|mongodb[_-]?url)\s*[:=]\s*["\']?[^\s"\']+["\']?',
+))
+
 def sanitize_for_llm(text: str) -> str:
     """Sanitize text to prevent accidental leakage of secrets to LLM."""
     if not text:
         return text
     
-    # Patterns to scrub (case-insensitive)
-    secret_patterns = [
-        r'(?i)(api[_-]?key|secret|token|password|passwd|pwd)\s*[:=]\s*["\']?[^\s"\']+["\']?',
-        r'(?i)(auth[_-]?token|bearer[_-]?token|access[_-]?token)\s*[:=]\s*["\']?[^\s"\']+["\']?',
-        r'(?i)(private[_-]?key|public[_-]?key)\s*[:=]\s*["\']?[^\s"\']+["\']?',
-        r'(?i)(database[_-]?url|db[_-]?url|connection[_-]?string)\s*[:=]\s*["\']?[^\s"\']+["\']?',
-        r'(?i)(redis[_-]?url|mongodb[_-]?url)\s*[:=]\s*["\']?[^\s"\']+["\']?',
-    ]
-    
     sanitized = text
-    for pattern in secret_patterns:
-        sanitized = re.sub(pattern, r'\1=***REDACTED***', sanitized)
+    for pattern in _SECRET_PATTERNS:
+        sanitized = pattern.sub(r'\1=***REDACTED***', sanitized)
     
     return sanitized
 
+def _sanitize_values(obj: Any) -> Any:
+    """Apply sanitize_for_llm to every string in a JSON-like structure."""
+    if isinstance(obj, str):
+        return sanitize_for_llm(obj)
+    if isinstance(obj, dict):
+        return {_sanitize_values(k): _sanitize_values(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_sanitize_values(v) for v in obj]
+    if obj is None or isinstance(obj, (bool, int, float)):
+        return obj
+    # Anything else would be serialized via default=str, so sanitize that text
+    return sanitize_for_llm(str(obj))
+
+def _context_text(context: Any) -> str:
+    """Compact JSON for prompt context: smaller than repr() and easier for the model to read.
+
+    Strings are sanitized before serializing: JSON escapes quotes as \\", which
+    the secret patterns would stop at.
+    """
+    return json.dumps(_sanitize_values(context), separators=(",", ":"), ensure_ascii=False, default=str)
+
 def file_messages(context: Dict[str, Any]) -> List[Dict[str, Any]]:
     # Sanitize context to prevent secret leakage
-    sanitized_context = sanitize_for_llm(str(context))
+    sanitized_context = _context_text(context)
     return [
         {"role": "system", "content": SYSTEM_FILE},
         {"role": "user", "content": f"Produce strict JSON per schema.\nContext:\n{sanitized_context}"},
@@ -119,7 +141,7 @@ def file_messages(context: Dict[str, Any]) -> List[Dict[str, Any]]:
 
 def capability_messages(context: Dict[str, Any]) -> List[Dict[str, Any]]:
     # Sanitize context to prevent secret leakage
-    sanitized_context = sanitize_for_llm(str(context))
+    sanitized_context = _context_text(context)
     return [
         {"role": "system", "content": SYSTEM_CAPABILITY},
         {"role": "user", "content": f"Produce strict JSON per schema.\nContext:\n{sanitized_context}"},
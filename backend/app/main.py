@@ -2,15 +2,16 @@ from __future__ import annotations
 import asyncio
 import json
 import hashlib
+import heapq
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List
 
 from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import settings
 from .utils.id_gen import short_id
+from .utils.io import read_json
 from .status import StatusStore
 from .models import (
     IngestResponse, StatusPayload,
@@ -39,6 +40,11 @@ app.add_middleware(
 async def _startup():
     asyncio.create_task(job_queue.start_worker())
 
+@app.on_event("shutdown")
+async def _shutdown():
+    from app.llm.client import close_llm_transport
+    await close_llm_transport()
+
 def repo_dir(repo_id: str) -> Path:
     return Path(settings.DATA_DIR) / repo_id
 
@@ -156,7 +162,7 @@ def get_graph(repo_id: str):
     path = repo_dir(repo_id) / "graph.json"
     if not path.exists():
         raise HTTPException(404, detail="graph.json not found")
-    return json.loads(path.read_text())
+    return read_json(path)
 
 # ------------------------- V1 API -------------------------
 @app.get("/v1/repo/{repo_id}", tags=["v1"], response_model=RepoOverviewModel)
@@ -169,10 +175,10 @@ def get_repo_overview(repo_id: str):
     m = base / "metrics.json"
     if not (t.exists() and f.exists() and c.exists() and m.exists()):
         raise HTTPException(404, detail="one or more artifacts missing")
-    caps = json.loads(c.read_text()).get("capabilities")
+    caps = read_json(c).get("capabilities")
     return {
-        "tree": json.loads(t.read_text()),
-        "files": json.loads(f.read_text()),
+        "tree": read_json(t),
+        "files": read_json(f),
         "capabilities": [
             {
                 **c,
@@ -180,7 +186,7 @@ def get_repo_overview(repo_id: str):
             }
             for c in (caps or [])
         ],
-        "metrics": json.loads(m.read_text()),
+        "metrics": read_json(m),
     }
 
 @app.get("/v1/repo/{repo_id}/capabilities", tags=["v1"], response_model=list[CapabilitySummaryModel])
@@ -192,7 +198,7 @@ def list_caps_v1(repo_id: str):
     if not index_path.exists():
         raise HTTPException(404, detail="capabilities index not found")
 
-    index_data = json.loads(index_path.read_text())
+    index_data = read_json(index_path)
     cap_ids = index_data.get("index", [])
 
     caps = []
@@ -206,7 +212,7 @@ def list_caps_v1(repo_id: str):
         cap_file = cap_dir / cap_id / "capability.json"
         if cap_file.exists():
             try:
-                cap_data = json.loads(cap_file.read_text())
+                cap_data = read_json(cap_file)
                 cap_data.setdefault("purpose", "")
                 cap_data.setdefault("entryPoints", [e.get("path") if isinstance(e, dict) else e for e in cap_data.get("entrypoints", [])])
                 cap_data.setdefault("keyFiles", [])
@@ -225,12 +231,9 @@ def list_caps_v1(repo_id: str):
 async def rebuild_caps_v1(repo_id: str):
     base = repo_dir(repo_id)
     from .capabilities import build_all_capabilities
+    # Returns the capability IDs; capabilities/*.json and index.json are already written
     caps = await build_all_capabilities(base)
-    cap_dir = base / "capabilities"
-    # build_all_capabilities now returns a list of capability IDs
-    idx = {"index": caps if isinstance(caps, list) else []}
-    (cap_dir / "index.json").write_text(json.dumps(idx, indent=2))
-    return {"ok": True, "count": len(idx["index"])}
+    return {"ok": True, "count": len(caps) if isinstance(caps, list) else 0}
 
 @app.get("/v1/repo/{repo_id}/file", tags=["v1"])
 def get_file_details(repo_id: str, path: str):
@@ -239,7 +242,7 @@ def get_file_details(repo_id: str, path: str):
     f = base / "files.json"
     if not f.exists():
         raise HTTPException(404, detail="files.json not found")
-    data = json.loads(f.read_text())
+    data = read_json(f)
     
     for entry in data.get("files", []):
         if entry.get("path") == path:
@@ -258,16 +261,34 @@ def get_file_details(repo_id: str, path: str):
             try:
                 cache_dir = base / "cache_llm"
                 if cache_dir.exists():
-                    filename = entry["path"].split("/")[-1]
+                    filename = entry["path"].split("/")[-1].lower()
                     file_base = filename.split(".")[0]
                     
+                    # Path-based keywords depend only on this file, so pick them once
+                    file_path = entry["path"].lower()
+                    penalty_words = ()
+                    if "domains" in file_path:
+                        area_words = ("domain", "domains", "registration", "search", "add")
+                        # Strong penalty for non-domain related summaries
+                        penalty_words = ("demo", "component", "navigation", "icon", "svg")
+                    elif "monitor" in file_path:
+                        area_words = ("monitor", "monitoring", "status", "health", "uptime")
+                    elif "utils" in file_path:
+                        area_words = ("utility", "util", "helper", "tool", "pg-api")
+                    elif "services" in file_path:
+                        area_words = ("service", "business", "logic", "api", "database")
+                    elif "components" in file_path:
+                        area_words = ("component", "ui", "interface", "display")
+                    else:
+                        area_words = ()
+                    
                     # Look through cache files for ones that match this specific file
                     best_match = None
                     best_score = 0
                     
                     for cache_file in cache_dir.glob("*.json"):
                         try:
-                            llm_data = json.loads(cache_file.read_text())
+                            llm_data = read_json(cache_file)
                             
                             # Skip if this doesn't look like a file summary
                             if not llm_data.get("title") or not llm_data.get("purpose"):
@@ -284,37 +305,23 @@ def get_file_details(repo_id: str, path: str):
                             score = 0
                             
                             # Exact filename match in title (highest priority)
-                            if filename.lower() in title:
+                            if filename in title:
                                 score += 100
                                 
                             # Base filename match in title
-                            if file_base.lower() in title:
+                            if file_base in title:
                                 score += 80
                                 
                             # Exact filename match anywhere in content
-                            if filename.lower() in (purpose + dev_summary):
+                            if filename in (purpose + dev_summary):
                                 score += 60
                                 
                             # Path-based matching for domain-locker files
-                            file_path = entry["path"].lower()
-                            if "domains" in file_path:
-                                if any(word in (title + purpose) for word in ["domain", "domains", "registration", "search", "add"]):
-                                    score += 40
-                                # Strong penalty for non-domain related summaries
-                                elif any(word in (title + purpose) for word in ["demo", "component", "navigation", "icon", "svg"]):
-                                    score -= 50
-                            elif "monitor" in file_path:
-                                if any(word in (title + purpose) for word in ["monitor", "monitoring", "status", "health", "uptime"]):
-                                    score += 40
-                            elif "utils" in file_path:
-                                if any(word in (title + purpose) for word in ["utility", "util", "helper", "tool", "pg-api"]):
-                                    score += 40
-                            elif "services" in file_path:
-                                if any(word in (title + purpose) for word in ["service", "business", "logic", "api", "database"]):
-                                    score += 40
-                            elif "components" in file_path:
-                                if any(word in (title + purpose) for word in ["component", "ui", "interface", "display"]):
-                                    score += 40
+                            title_purpose = title + purpose
+                            if any(word in title_purpose for word in area_words):
+                                score += 40
+                            elif any(word in title_purpose for word in penalty_words):
+                                score -= 50
                                 
                             # Only use matches with high confidence
                             if score > best_score and score >= 80:
@@ -401,16 +408,13 @@ def get_cap_v1(repo_id: str, cap_id: str):
         for e in cap.get("controlFlow", []):
             out_map.setdefault(e["from"], []).append(e["to"])
             in_map.setdefault(e["to"], []).append(e["from"])
-        all_nodes = set()
-        for arr in swim.values():
-            for it in arr:
-                all_nodes.add(it if isinstance(it, str) else it.get("path"))
+        # Resolve each swimlane entry to its path once; the keys double as the node set
         lane_for = {}
         for lane, arr in swim.items():
             for it in arr:
                 p = it if isinstance(it, str) else it.get("path")
                 lane_for[p] = lane
-        for n in all_nodes:
+        for n in lane_for:
             incoming = in_map.get(n, [])
             outgoing = out_map.get(n, [])
             role = "entrypoint" if n in entry_set else ("sink" if len(outgoing) == 0 else "handler")
@@ -441,7 +445,6 @@ def get_cap_v1(repo_id: str, cap_id: str):
                 out_map.setdefault(f, []).append(t)
 
         # Walk from each entry, greedily taking first unseen edge to build a path
-        visited: set[str] = set()
         best_path: list[str] = []
         for start in entry_points or list(out_map.keys()):
             cur = start
@@ -452,11 +455,8 @@ def get_cap_v1(repo_id: str, cap_id: str):
                 steps_guard += 1
                 path.append(cur)
                 local_seen.add(cur)
-                nexts = [n for n in out_map.get(cur, []) if n not in local_seen]
-                if not nexts:
-                    break
-                # Prefer nodes that eventually lead to no outgoing (sinks)
-                cur = nexts[0]
+                # Only the first unseen successor is taken, so stop scanning there
+                cur = next((n for n in out_map.get(cur, ()) if n not in local_seen), None)
             if len(path) > len(best_path):
                 best_path = path
 
@@ -494,7 +494,7 @@ def get_tree(repo_id: str):
     path = repo_dir(repo_id) / "tree.json"
     if not path.exists():
         raise HTTPException(404, detail="tree.json not found")
-    return json.loads(path.read_text())
+    return read_json(path)
 
 @app.get("/repo/{repo_id}/metrics")
 def get_metrics(repo_id: str):
@@ -502,7 +502,7 @@ def get_metrics(repo_id: str):
     path = repo_dir(repo_id) / "metrics.json"
     if not path.exists():
         raise HTTPException(404, detail="metrics not found")
-    return json.loads(path.read_text())
+    return read_json(path)
 
 @app.get("/repo/{repo_id}/suggestions")
 def get_suggestions(repo_id: str, capability: str = None):
@@ -518,8 +518,8 @@ def get_suggestions(repo_id: str, capability: str = None):
     if not caps_path.exists():
         raise HTTPException(404, detail="capabilities.json not found")
     
-    files_data = json.loads(files_path.read_text())
-    caps_data = json.loads(caps_path.read_text())
+    files_data = read_json(files_path)
+    caps_data = read_json(caps_path)
     
     # Find target capability if specified
     target_cap = None
@@ -535,14 +535,17 @@ def get_suggestions(repo_id: str, capability: str = None):
     suggestions = []
     files = files_data.get("files", [])
     
+    # Files in the target capability, collected once rather than per candidate file
+    cap_files = set()
+    if target_cap:
+        for lane_files in target_cap.get("swimlanes", {}).values():
+            if isinstance(lane_files, list):
+                for it in lane_files:
+                    cap_files.add(it if isinstance(it, str) else it.get("path"))
+    
     for f in files:
         if target_cap:
             # Only suggest files in the target capability
-            cap_files = set()
-            for lane_files in target_cap.get("swimlanes", {}).values():
-                if isinstance(lane_files, list):
-                    for it in lane_files:
-                        cap_files.add(it if isinstance(it, str) else it.get("path"))
             if f["path"] not in cap_files:
                 continue
         
@@ -600,12 +603,13 @@ def get_suggestions(repo_id: str, capability: str = None):
     
     # Sort by confidence (High, Med, Low)
     confidence_order = {"High": 0, "Med": 1, "Low": 2}
-    suggestions.sort(key=lambda x: confidence_order.get(x["confidence"], 3))
+    # Top 20; stable like sort()[:20] without ordering the whole list
+    suggestions = heapq.nsmallest(20, suggestions, key=lambda x: confidence_order.get(x["confidence"], 3))
     
     return {
         "repoId": repo_id,
         "capability": capability,
-        "suggestions": suggestions[:20],  # Limit to top 20
+        "suggestions": suggestions,
         "generatedAt": datetime.now(timezone.utc).isoformat()
     }
 
@@ -628,7 +632,7 @@ def get_glossary(repo_id: str):
     path = repo_dir(repo_id) / "glossary.json"
     if not path.exists():
         raise HTTPException(404, detail="glossary not found")
-    return json.loads(path.read_text())
+    return read_json(path)
 
 @app.post("/repo/{repo_id}/capabilities/auto")
 async def post_capabilities_auto(repo_id: str):
@@ -655,7 +659,7 @@ def get_files_filtered(repo_id: str, capability: str | None = None):
     files_path = base / "files.json"
     if not files_path.exists():
         raise HTTPException(404, detail="files.json not found")
-    files_payload = json.loads(files_path.read_text())
+    files_payload = read_json(files_path)
     if not capability:
         return files_payload
 
@@ -666,14 +670,13 @@ def get_files_filtered(repo_id: str, capability: str | None = None):
         raise HTTPException(404, detail="capability not found")
 
     # Prefer swimlanes; tolerate both string paths and {path} objects
-    import itertools as _it
     swim = cap.get("swimlanes", {}) or {}
-    seqs = list(swim.values())
-    flat: List[str] = []
-    for seq in seqs:
+    node_paths = set()
+    for seq in swim.values():
         for it in (seq or []):
-            flat.append(it if isinstance(it, str) else it.get("path"))
-    node_paths = set([p for p in flat if p])
+            p = it if isinstance(it, str) else it.get("path")
+            if p:
+                node_paths.add(p)
     filtered = [f for f in files_payload.get("files", []) if f.get("path") in node_paths]
     return {**files_payload, "files": filtered}
 
@@ -690,6 +693,29 @@ async def post_qa(repo_id: str, body: dict):
     except Exception as e:
         raise HTTPException(500, detail=f"QA failed: {e}")
 
+_SCENARIO_SYSTEM = """You are an expert software architect analyzing application flows. Respond STRICTLY as minified JSON matching the provided schema. Do not include commentary or markdown. Generate a detailed scenario analysis that includes:
+
+1. **Happy Path**: The ideal execution flow with all components working correctly
+2. **Edge Cases**: Common failure scenarios and how the system handles them
+3. **Error Handling**: What happens when things go wrong
+4. **Dependencies**: External systems and potential points of failure
+
+Be specific about the actual files and components involved. Use the exact file paths and component names provided in the context. Only reference files present in the 'Allowed Files (strict)' list. Do NOT talk about generic app initialization, middleware setup, or unrelated routes. Focus only on this capability's end-to-end flow. Output schema:
+{
+  "happy_path": string[],
+  "edge_cases": string[],
+  "analysis"?: string
+}
+"""
+
+_SCENARIO_INSTRUCTIONS = """For the capability described below, provide:
+1. **Happy Path Flow**: Step-by-step execution when everything works
+2. **Edge Cases**: 3-4 specific failure scenarios with how they're handled
+3. **Error Recovery**: What happens when components fail
+4. **Dependencies**: Critical external dependencies that could cause issues
+
+Focus on realistic scenarios based on the actual codebase structure."""
+
 @app.post("/v1/repo/{repo_id}/capabilities/{cap_id}/scenarios")
 async def generate_scenario_analysis(repo_id: str, cap_id: str, scenario: str = "happy"):
     """Generate LLM-powered scenario analysis for a capability"""
@@ -701,7 +727,7 @@ async def generate_scenario_analysis(repo_id: str, cap_id: str, scenario: str =
         if not cap_file.exists():
             raise HTTPException(404, detail=f"Capability {cap_id} not found")
         
-        capability_data = json.loads(cap_file.read_text())
+        capability_data = read_json(cap_file)
         
         # Prepare context for LLM
         # Normalize lists that may contain strings or {path} objects
@@ -744,7 +770,8 @@ async def generate_scenario_analysis(repo_id: str, cap_id: str, scenario: str =
         allowed_files = sorted([p for p in allowed_files_set if p])
         
         # Build context for scenario analysis
-        context = f"""
+        # Collect the context as parts and join once instead of growing one string
+        parts = [f"""
 Capability: {capability_data.get("name", cap_id)}
 Purpose: {capability_data.get("purpose", "No description available")}
 
@@ -755,64 +782,44 @@ Input Data: {', '.join(data_in)}
 Output Data: {', '.join(data_out)}
 
 Steps:
-"""
+"""]
         for i, step in enumerate(steps, 1):
-            context += f"{i}. {step.get('title', 'Unknown step')}: {step.get('description', 'No description')}\n"
+            parts.append(f"{i}. {step.get('title', 'Unknown step')}: {step.get('description', 'No description')}\n")
             if step.get('fileId'):
-                context += f"   File: {step['fileId']}\n"
+                parts.append(f"   File: {step['fileId']}\n")
 
         # Add compact control flow and lanes
-        context += "\nControl Flow (from -> to):\n"
+        parts.append("\nControl Flow (from -> to):\n")
         for e in control_flow:
             try:
-                context += f"- {e.get('from')} -> {e.get('to')} ({e.get('kind','call')})\n"
+                parts.append(f"- {e.get('from')} -> {e.get('to')} ({e.get('kind','call')})\n")
             except Exception:
                 continue
 
-        context += "\nSwimlanes:\n"
+        parts.append("\nSwimlanes:\n")
         for lane, nodes in (swimlanes or {}).items():
-            context += f"- {lane}: {', '.join([n if isinstance(n, str) else n.get('path','') for n in (nodes or [])])}\n"
+            parts.append(f"- {lane}: {', '.join([n if isinstance(n, str) else n.get('path','') for n in (nodes or [])])}\n")
 
-        context += "\nAllowed Files (strict):\n" + "\n".join([f"- {p}" for p in allowed_files]) + "\n"
+        parts.append("\nAllowed Files (strict):\n" + "\n".join([f"- {p}" for p in allowed_files]) + "\n")
+        context = "".join(parts)
         
-        # Generate scenario-specific analysis
+        # Generate scenario-specific analysis. Static text leads every message and the
+        # per-capability data goes last, so provider-side prompt caching can reuse the prefix.
         messages = [
+            {"role": "system", "content": _SCENARIO_SYSTEM},
             {
-                "role": "system",
-                "content": """You are an expert software architect analyzing application flows. Respond STRICTLY as minified JSON matching the provided schema. Do not include commentary or markdown. Generate a detailed scenario analysis that includes:
-
-1. **Happy Path**: The ideal execution flow with all components working correctly
-2. **Edge Cases**: Common failure scenarios and how the system handles them
-3. **Error Handling**: What happens when things go wrong
-4. **Dependencies**: External systems and potential points of failure
-
-Be specific about the actual files and components involved. Use the exact file paths and component names provided in the context. Only reference files present in the 'Allowed Files (strict)' list. Do NOT talk about generic app initialization, middleware setup, or unrelated routes. Focus only on this capability's end-to-end flow. Output schema:
-{
-  "happy_path": string[],
-  "edge_cases": string[],
-  "analysis"?: string
-}
-"""
-            },
-            {
-                "role": "user", 
-                "content": f"""Analyze this capability for the "{scenario}" scenario:
+                "role": "user",
+                "content": f"""{_SCENARIO_INSTRUCTIONS}
 
-{context}
+Analyze this capability for the "{scenario}" scenario:
 
-Please provide:
-1. **Happy Path Flow**: Step-by-step execution when everything works
-2. **Edge Cases**: 3-4 specific failure scenarios with how they're handled
-3. **Error Recovery**: What happens when components fail
-4. **Dependencies**: Critical external dependencies that could cause issues
-
-Focus on realistic scenarios based on the actual codebase structure."""
+{context}"""
             }
         ]
         
         # Use the LLM client to generate structured analysis
-        from app.llm.client import LLMClient
-        llm = LLMClient(cache_dir=base / "cache_llm")
+        from app.llm.client import get_llm_client
+        llm = get_llm_client(base / "cache_llm")
 
         schema = {
             "type": "object",
@@ -1,14 +1,16 @@
 from __future__ import annotations
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 from typing import Dict, Any, List, Tuple, Optional
 from datetime import datetime, timezone
 import json
+import os
 import hashlib
+import heapq
 import time
 
 from app.config import settings
-from app.parsers.js_ts import parse_js_ts_file
-from app.parsers.python import parse_python_file
+from app.parsers.js_ts import parse_js_ts_file, _BUILD_DIRS
+from app.parsers.python import parse_python_file, _SKIPPED_SEGMENT_PREFIXES
 from app.models import FileNodeModel, ImportModel, FunctionModel, ClassModel, RouteModel, SymbolsModel
 from typing import cast
 
@@ -345,30 +347,87 @@ def detect_project_context(snapshot: Path) -> Dict[str, Any]:
 
     return ctx
 
+# Path segments excluded from source iteration (set lookups instead of per-segment any());
+# _BUILD_DIRS comes from js_ts, which applies the same filter to its own walk
+_TEST_DIRS = frozenset({"test", "tests", "__tests__", "spec", "specs"})
+_NON_SOURCE_DIRS = _BUILD_DIRS | _TEST_DIRS
+_SOURCE_EXTENSIONS = frozenset({".py", ".js", ".ts", ".jsx", ".tsx", ".mjs", ".cjs"})
+
 def iter_all_source_files(repo_root: Path):
     """Iterate over all source files (.py, .js, .ts, .jsx, .tsx), skipping build artifacts."""
-    source_extensions = {".py", ".js", ".ts", ".jsx", ".tsx", ".mjs", ".cjs"}
-    
     for p in repo_root.rglob("*"):
         if not p.is_file():
             continue
             
         # Skip if not a source file
-        if p.suffix.lower() not in source_extensions:
+        if p.suffix.lower() not in _SOURCE_EXTENSIONS:
             continue
             
         # Skip virtualenvs, hidden, tests, and build artifacts
-        if any(seg.startswith((".", "__pycache__", "venv", "env")) for seg in p.parts):
+        if any(seg.startswith(_SKIPPED_SEGMENT_PREFIXES) for seg in p.parts):
             continue
-        if any(seg in ("node_modules", "dist", "build", ".next", ".nuxt", "out") for seg in p.parts):
+        if not _BUILD_DIRS.isdisjoint(p.parts):
             continue
         if "runs/" in str(p.relative_to(repo_root)):
             continue
-        if any(seg in ("test", "tests", "__tests__", "spec", "specs") for seg in p.parts):
+        if not _TEST_DIRS.isdisjoint(p.parts):
             continue
             
         yield p
 
+def scan_source_files(repo_root: Path) -> Tuple[List[Path], List[Tuple[Path, str, os.stat_result]]]:
+    """
+    One os.scandir walk producing both ``list(iter_all_source_files(repo_root))`` and the
+    ``iter_py_files(repo_root)`` listing as ``(path, rel_path, stat)``, same files and order.
+    """
+    source_files: List[Path] = []
+    py_scan: List[Tuple[Path, str, os.stat_result]] = []
+    if any(seg.startswith(_SKIPPED_SEGMENT_PREFIXES) for seg in repo_root.parts):
+        return source_files, py_scan
+    root_len = len(str(repo_root)) + 1
+
+    def walk(dir_path: str, source_dir: bool) -> None:
+        try:
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except OSError:
+            return
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+            if name.startswith(_SKIPPED_SEGMENT_PREFIXES):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append((entry.path, source_dir and name not in _NON_SOURCE_DIRS))
+                    continue
+                is_py = name.endswith(".py")
+                is_source = (
+                    source_dir
+                    and os.path.splitext(name)[1].lower() in _SOURCE_EXTENSIONS
+                    and name not in _NON_SOURCE_DIRS
+                )
+                if not (is_py or is_source) or not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            rel_path = entry.path[root_len:]
+            if "runs/" in rel_path:
+                continue
+            path = Path(entry.path)
+            if is_source:
+                source_files.append(path)
+            if is_py:
+                try:
+                    py_scan.append((path, rel_path, entry.stat()))
+                except OSError:
+                    pass
+        for sub, sub_is_source in subdirs:
+            walk(sub, sub_is_source)
+
+    walk(str(repo_root), _NON_SOURCE_DIRS.isdisjoint(repo_root.parts))
+    return source_files, py_scan
+
 def discover_files(snapshot: Path) -> List[Dict[str, Any]]:
     """Enhanced file discovery with better filtering and metadata."""
     files: List[Dict[str, Any]] = []
@@ -378,8 +437,13 @@ def discover_files(snapshot: Path) -> List[Dict[str, Any]]:
             continue
         
         # Use enhanced ignore patterns
-        if _is_ignored(p.relative_to(snapshot)):
+        rel = p.relative_to(snapshot)
+        if _is_ignored(rel):
             continue
+        # Normalize the path and extension once for every record below
+        rel_path = str(rel).replace("\\", "/")
+        ext = p.suffix.lower()
+        language = LANG_BY_EXT.get(ext, "other")
         
         try:
             # Get comprehensive metadata
@@ -389,9 +453,9 @@ def discover_files(snapshot: Path) -> List[Dict[str, Any]]:
             # Check file size limits
             if size > settings.MAX_FILE_MB * 1024 * 1024:
                 files.append({
-                    "path": str(p.relative_to(snapshot)).replace("\\", "/"),
-                    "ext": p.suffix.lower(),
-                    "language": LANG_BY_EXT.get(p.suffix.lower(), "other"),
+                    "path": rel_path,
+                    "ext": ext,
+                    "language": language,
                     "size": size,
                     "lines": None,
                     "skipped": True,
@@ -409,9 +473,9 @@ def discover_files(snapshot: Path) -> List[Dict[str, Any]]:
                 lines = None
             
             files.append({
-                "path": str(p.relative_to(snapshot)).replace("\\", "/"),
-                "ext": p.suffix.lower(),
-                "language": LANG_BY_EXT.get(p.suffix.lower(), "other"),
+                "path": rel_path,
+                "ext": ext,
+                "language": language,
                 "size": size,
                 "lines": lines,
                 "skipped": False,
@@ -421,9 +485,9 @@ def discover_files(snapshot: Path) -> List[Dict[str, Any]]:
             
         except Exception:
             files.append({
-                "path": str(p.relative_to(snapshot)).replace("\\", "/"),
-                "ext": p.suffix.lower(),
-                "language": LANG_BY_EXT.get(p.suffix.lower(), "other"),
+                "path": rel_path,
+                "ext": ext,
+                "language": language,
                 "size": None,
                 "lines": None,
                 "skipped": True,
@@ -460,7 +524,8 @@ def _save_parse_cache(cache_path: Path, cache_data: Dict[str, Dict[str, Any]]) -
             serializable_cache[file_path] = serializable_entry
         
         with cache_path.open('w', encoding='utf-8') as f:
-            json.dump(serializable_cache, f, indent=2, ensure_ascii=False)
+            # Compact: the cache is only read back by _load_parse_cache
+            json.dump(serializable_cache, f, separators=(",", ":"), ensure_ascii=False)
     except Exception:
         pass
 
@@ -803,8 +868,9 @@ def parse_files(snapshot: Path, discovered: List[Dict[str, Any]]) -> Tuple[List[
 
 def build_files_payload(repo_id: str, files_list: List[Dict[str, Any]], top_warnings: List[str]) -> Dict[str, Any]:
     """Build the final files payload with unified schema compliance."""
-    # Normalize files to unified schema
+    # Normalize files to unified schema, counting languages in the same pass
     normalized_files = []
+    lang_counts: Dict[str, int] = {}
     for f in files_list:
         # Ensure all required fields are present
         normalized_file = {
@@ -839,11 +905,7 @@ def build_files_payload(repo_id: str, files_list: List[Dict[str, Any]], top_warn
                             break
         
         normalized_files.append(normalized_file)
-    
-    # Count languages
-    lang_counts: Dict[str, int] = {}
-    for f in normalized_files:
-        lang = f.get("language", "other")
+        lang = normalized_file["language"]
         lang_counts[lang] = lang_counts.get(lang, 0) + 1
     
     payload = {
@@ -858,6 +920,9 @@ def build_files_payload(repo_id: str, files_list: List[Dict[str, Any]], top_warn
     }
     return payload
 
+_LOCAL_IMPORT_PREFIXES = (".", "/", "@/")
+_ROOTED_IMPORT_PREFIXES = ("src/", "app", "lib/", "server/", "client/")
+
 def build_graph(files_payload: Dict[str, Any]) -> Dict[str, Any]:
     # Build nodes keyed by posix path (exactly as stored in files.json)
     nodes = {f["path"]: {"id": f["path"], "inDegree": 0, "outDegree": 0} for f in files_payload["files"]}
@@ -889,8 +954,6 @@ def build_graph(files_payload: Dict[str, Any]) -> Dict[str, Any]:
         - python module ('pkg.mod.sub') or bare ('name')
         Returns (resolved_path or None, external_flag).
         """
-        from pathlib import PurePosixPath
-
         raw_str = raw.strip()
         # 1) Relative paths: ./ or ../
         if raw_str.startswith("."):
@@ -952,7 +1015,8 @@ def build_graph(files_payload: Dict[str, Any]) -> Dict[str, Any]:
             raw = imp.get("raw")
             if not raw:
                 continue
-            resolved, external = resolve(frm, raw)
+            raw_str = raw.strip()
+            resolved, external = resolve(frm, raw_str)
             # Prefer resolved internal path when available
             edge_to = resolved or raw
             edge = {"from": frm, "to": edge_to, "external": external}
@@ -963,18 +1027,15 @@ def build_graph(files_payload: Dict[str, Any]) -> Dict[str, Any]:
                 nodes[resolved]["inDegree"] += 1
             else:
                 # Looks like a local-ish import but couldn’t resolve → helpful warning
-                raw_str = raw.strip()
                 if (
-                    raw_str.startswith(".")
-                    or raw_str.startswith("/")
-                    or raw_str.startswith("@/")
-                    or (raw_str.startswith(("src/", "app", "lib/", "server/", "client/")) and "/" in raw_str)
+                    raw_str.startswith(_LOCAL_IMPORT_PREFIXES)
+                    or (raw_str.startswith(_ROOTED_IMPORT_PREFIXES) and "/" in raw_str)
                     or ("." in raw_str and "/" not in raw_str)  # python dotted import
                 ):
                     warnings.append(f"Unresolved local import '{raw}' in {frm}")
             edges.append(edge)
 
-    top_hubs = sorted(nodes.values(), key=lambda n: (n["inDegree"] + n["outDegree"]), reverse=True)[:10]
+    top_hubs = heapq.nlargest(10, nodes.values(), key=lambda n: (n["inDegree"] + n["outDegree"]))
     return {
         "repoId": files_payload["repoId"],
         "generatedAt": files_payload["generatedAt"],
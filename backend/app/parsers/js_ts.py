@@ -30,6 +30,8 @@ RE_ARROW_DECL = re.compile(
 )
 RE_RETURNS_JSX = re.compile(r'return\s*<', re.MULTILINE)
 RE_JSX_LITERAL = re.compile(r'<[A-Za-z]', re.MULTILINE)
+# Case-insensitive "express" probe; avoids lowercasing a copy of the whole file
+RE_EXPRESS = re.compile(r'express', re.IGNORECASE)
 
 # Default-exported anonymous function/arrow with JSX
 RE_DEFAULT_ANON_FUNC = re.compile(
@@ -37,6 +39,10 @@ RE_DEFAULT_ANON_FUNC = re.compile(
     re.MULTILINE
 )
 
+# Path segments skipped by the route / interface / schema scans
+_BUILD_DIRS = frozenset({"node_modules", "dist", "build", ".next", ".nuxt", "out"})
+_VENDORED_DIRS = frozenset({"node_modules", "dist", "build", ".next"})
+
 
 def _read_text(p: Path) -> str:
     try:
@@ -121,7 +127,7 @@ def find_all_routes(repo_root: Path) -> List[Dict[str, str]]:
             continue
             
         # Skip build artifacts and dependencies
-        if any(seg in ("node_modules", "dist", "build", ".next", ".nuxt", "out") for seg in file_path.parts):
+        if not _BUILD_DIRS.isdisjoint(file_path.parts):
             continue
         if any(seg.startswith(".") for seg in file_path.parts):
             continue
@@ -232,7 +238,7 @@ def collect_typescript_interfaces(repo_root: Path) -> Dict[str, Dict[str, Any]]:
             continue
             
         # Skip build artifacts
-        if any(seg in ("node_modules", "dist", "build", ".next") for seg in file_path.parts):
+        if not _VENDORED_DIRS.isdisjoint(file_path.parts):
             continue
         if any(seg.startswith(".") for seg in file_path.parts):
             continue
@@ -284,7 +290,7 @@ def collect_javascript_schemas(repo_root: Path) -> Dict[str, Dict[str, Any]]:
             continue
             
         # Skip build artifacts
-        if any(seg in ("node_modules", "dist", "build", ".next") for seg in file_path.parts):
+        if not _VENDORED_DIRS.isdisjoint(file_path.parts):
             continue
         if any(seg.startswith(".") for seg in file_path.parts):
             continue
@@ -337,7 +343,7 @@ def _detect_framework_hints(path: str, text: str, ext: str) -> Dict[str, Any]:
             hints["isAPI"] = True
 
     # Express.js detection
-    if "express" in text.lower() or "app.get" in text or "router.get" in text:
+    if "app.get" in text or "router.get" in text or RE_EXPRESS.search(text):
         hints["framework"] = "express"
         hints["isAPI"] = True
         hints["isRoute"] = True
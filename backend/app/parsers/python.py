@@ -338,25 +338,30 @@ def _extract_function_calls(tree: ast.AST) -> List[str]:
     return list(set(calls))
 
 
+_NET_RE = re.compile(r"\b(requests|urllib|httpx|aiohttp)\b")
+_IO_RE = re.compile(r"\b(open|read|write|os\.|pathlib)\b")
+_DB_RE = re.compile(r"\b(sqlalchemy|django\.db|psycopg|pymongo|redis)\b")
+_ASYNC_RE = re.compile(r"\b(async|await)\b")
+
 def _detect_side_effects(text: str) -> List[str]:
     """Detect side effects in Python code."""
     tags = []
     lower = text.lower()
     
     # Network calls
-    if re.search(r"\b(requests|urllib|httpx|aiohttp)\b", lower):
+    if _NET_RE.search(lower):
         tags.append("net")
     
     # File I/O
-    if re.search(r"\b(open|read|write|os\.|pathlib)\b", lower):
+    if _IO_RE.search(lower):
         tags.append("io")
     
     # Database
-    if re.search(r"\b(sqlalchemy|django\.db|psycopg|pymongo|redis)\b", lower):
+    if _DB_RE.search(lower):
         tags.append("db")
     
     # Async operations
-    if re.search(r"\b(async|await)\b", lower):
+    if _ASYNC_RE.search(lower):
         tags.append("async")
     
     return list(dict.fromkeys(tags))
@@ -1089,16 +1094,48 @@ def extract_file_summary(text: str, path: str) -> str:
     except Exception as e:
         return f"Module at {path}"
 
+# Path segment prefixes skipped by every source walk (virtualenvs, hidden, caches)
+_SKIPPED_SEGMENT_PREFIXES = (".", "__pycache__", "venv", "env")
+
 def iter_py_files(repo_root: Path):
     """Iterate over Python files, skipping virtualenvs and hidden directories."""
+    root_len = len(str(repo_root)) + 1
     for p in repo_root.rglob("*.py"):
         # skip virtualenvs, hidden, tests, and runs by common patterns
-        if any(seg.startswith((".", "__pycache__", "venv", "env")) for seg in p.parts):
+        if any(seg.startswith(_SKIPPED_SEGMENT_PREFIXES) for seg in p.parts):
             continue
-        if "runs/" in str(p.relative_to(repo_root)):
+        if "runs/" in str(p)[root_len:]:
             continue
         yield p
 
+def _pydantic_models_in(src: str, f: Path, rel_path: str, out: Dict[str, Any],
+                        tree: Optional[ast.Module] = None) -> None:
+    """Add the ``class X(BaseModel)`` models declared in one file to ``out`` (may raise).
+
+    Pass ``tree`` (``ast.parse(src)``) to reuse an already parsed module.
+    """
+    if tree is None:
+        tree = ast.parse(src, filename=str(f))
+    # detect `class X(BaseModel):` and gather annotated Assign targets
+    base_model_names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module and "pydantic" in node.module:
+            for n in node.names:
+                if n.name == "BaseModel":
+                    base_model_names.add("BaseModel")
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.bases:
+            if any(getattr(b, "id", None) == "BaseModel" or getattr(getattr(b, "attr", None), "lower", lambda: "" )() == "basemodel" for b in node.bases):
+                fields = []
+                for stmt in node.body:
+                    if isinstance(stmt, ast.AnnAssign) and hasattr(stmt.target, "id"):
+                        fields.append(stmt.target.id)
+                out[node.name] = {
+                    "path": rel_path,
+                    "kind": "pydantic.Model",
+                    "fields": fields
+                }
+
 def collect_pydantic_models(repo_root: Path):
     """
     Returns dict[name] = {
@@ -1106,30 +1143,12 @@ def collect_pydantic_models(repo_root: Path):
         "fields": [field_names]
     }
     """
-    import ast
     out = {}
+    root_len = len(str(repo_root)) + 1  # files are rooted at repo_root: slice, don't relative_to()
     for f in iter_py_files(repo_root):
         try:
-            tree = ast.parse(f.read_text(encoding="utf-8"), filename=str(f))
-            # detect `class X(BaseModel):` and gather annotated Assign targets
-            base_model_names = set()
-            for node in ast.walk(tree):
-                if isinstance(node, ast.ImportFrom) and node.module and "pydantic" in node.module:
-                    for n in node.names:
-                        if n.name == "BaseModel":
-                            base_model_names.add("BaseModel")
-            for node in tree.body:
-                if isinstance(node, ast.ClassDef) and node.bases:
-                    if any(getattr(b, "id", None) == "BaseModel" or getattr(getattr(b, "attr", None), "lower", lambda: "" )() == "basemodel" for b in node.bases):
-                        fields = []
-                        for stmt in node.body:
-                            if isinstance(stmt, ast.AnnAssign) and hasattr(stmt.target, "id"):
-                                fields.append(stmt.target.id)
-                        out[node.name] = {
-                            "path": str(f.relative_to(repo_root)),
-                            "kind": "pydantic.Model",
-                            "fields": fields
-                        }
+            src = f.read_text(encoding="utf-8")
+            _pydantic_models_in(src, f, str(f)[root_len:], out)
         except Exception:
             continue
     return out
@@ -1198,6 +1217,57 @@ def collect_sqlalchemy_models(repo_root: Path):
             continue
     return results
 
+def _fastapi_routes_in(src: str, f: Path, rel_path: str, out: List[Dict[str, Any]],
+                       tree: Optional[ast.Module] = None) -> None:
+    """Append the ``@router.<method>(...)`` routes declared in one file to ``out`` (may raise).
+
+    Pass ``tree`` (``ast.parse(src)``) to reuse an already parsed module.
+    """
+    if "APIRouter(" not in src and ".route(" not in src and ".get(" not in src:
+        return
+    t = tree if tree is not None else ast.parse(src, filename=str(f))
+    for node in t.body:
+        if isinstance(node, ast.FunctionDef) and node.decorator_list:
+            for dec in node.decorator_list:
+                # match @router.post("/path", response_model=Model)
+                method = None
+                route = None
+                response_model = None
+                if isinstance(dec, ast.Call) and isinstance(dec.func, ast.Attribute):
+                    if dec.func.attr in {"get","post","put","delete","patch"}:
+                        method = dec.func.attr
+                        # first arg is route
+                        if dec.args and isinstance(dec.args[0], (ast.Str, ast.Constant)):
+                            route = getattr(dec.args[0], "s", None) or getattr(dec.args[0], "value", None)
+                        for kw in dec.keywords or []:
+                            if kw.arg == "response_model":
+                                # response_model can be Name or Attribute
+                                if isinstance(kw.value, ast.Name):
+                                    response_model = kw.value.id
+                                elif isinstance(kw.value, ast.Attribute):
+                                    response_model = kw.value.attr
+                if method and route:
+                    params = []
+                    for a in node.args.args:
+                        ann = None
+                        if a.annotation:
+                            if isinstance(a.annotation, ast.Name):
+                                ann = a.annotation.id
+                            elif isinstance(a.annotation, ast.Subscript) and isinstance(a.annotation.value, ast.Name):
+                                ann = a.annotation.value.id
+                            elif isinstance(a.annotation, ast.Attribute):
+                                ann = a.annotation.attr
+                        params.append({"name": a.arg, "annotation": ann})
+                    out.append({
+                        "file": rel_path,
+                        "method": method,
+                        "route": route,
+                        "func": node.name,
+                        "params": params,
+                        "response_model": response_model,
+                        "decorator_lineno": getattr(dec, "lineno", node.lineno)
+                    })
+
 def find_fastapi_routes(repo_root: Path):
     """
     Returns list of {
@@ -1210,62 +1280,62 @@ def find_fastapi_routes(repo_root: Path):
       "decorator_lineno": int
     }
     """
-    import ast
     routes = []
+    root_len = len(str(repo_root)) + 1  # files are rooted at repo_root: slice, don't relative_to()
     for f in iter_py_files(repo_root):
         try:
             src = f.read_text(encoding="utf-8")
-            if "APIRouter(" not in src and ".route(" not in src and ".get(" not in src:
-                continue
-            t = ast.parse(src, filename=str(f))
-            for node in t.body:
-                if isinstance(node, ast.FunctionDef) and node.decorator_list:
-                    for dec in node.decorator_list:
-                        # match @router.post("/path", response_model=Model)
-                        method = None
-                        route = None
-                        response_model = None
-                        if isinstance(dec, ast.Call) and isinstance(dec.func, ast.Attribute):
-                            if dec.func.attr in {"get","post","put","delete","patch"}:
-                                method = dec.func.attr
-                                # first arg is route
-                                if dec.args and isinstance(dec.args[0], (ast.Str, ast.Constant)):
-                                    route = getattr(dec.args[0], "s", None) or getattr(dec.args[0], "value", None)
-                                for kw in dec.keywords or []:
-                                    if kw.arg == "response_model":
-                                        # response_model can be Name or Attribute
-                                        if isinstance(kw.value, ast.Name):
-                                            response_model = kw.value.id
-                                        elif isinstance(kw.value, ast.Attribute):
-                                            response_model = kw.value.attr
-                        if method and route:
-                            params = []
-                            for a in node.args.args:
-                                ann = None
-                                if a.annotation:
-                                    if isinstance(a.annotation, ast.Name):
-                                        ann = a.annotation.id
-                                    elif isinstance(a.annotation, ast.Subscript) and isinstance(a.annotation.value, ast.Name):
-                                        ann = a.annotation.value.id
-                                    elif isinstance(a.annotation, ast.Attribute):
-                                        ann = a.annotation.attr
-                                params.append({"name": a.arg, "annotation": ann})
-                            routes.append({
-                                "file": str(f.relative_to(repo_root)),
-                                "method": method,
-                                "route": route,
-                                "func": node.name,
-                                "params": params,
-                                "response_model": response_model,
-                                "decorator_lineno": getattr(dec, "lineno", node.lineno)
-                            })
+            _fastapi_routes_in(src, f, str(f)[root_len:], routes)
         except Exception:
             continue
     return routes
 
+# Byte-level sentinels: files matching neither are skipped without decoding or
+# AST parsing. Model bases match case-insensitively, like _pydantic_models_in.
+_MODEL_SENTINEL_RE = re.compile(rb"basemodel", re.IGNORECASE)
+_ROUTE_SENTINELS = (b"APIRouter(", b".route(", b".get(")
+
+def extract_models_and_routes(f: Path, rel_path: str, text: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Per-file counterpart of collect_pydantic_models + find_fastapi_routes.
+    Returns {"models": {name: model}, "routes": [route]} for a single file.
+    """
+    models: Dict[str, Any] = {}
+    routes: List[Dict[str, Any]] = []
+    if text is not None:
+        src = text
+        has_models = has_routes = True
+    else:
+        try:
+            data = f.read_bytes()
+            has_models = _MODEL_SENTINEL_RE.search(data) is not None
+            has_routes = any(s in data for s in _ROUTE_SENTINELS)
+            if not (has_models or has_routes):
+                return {"models": models, "routes": routes}
+            src = data.decode("utf-8")
+        except Exception:
+            return {"models": models, "routes": routes}
+    # Parse once and hand the same tree to both visitors
+    try:
+        tree = ast.parse(src, filename=str(f))
+    except Exception:
+        return {"models": models, "routes": routes}
+    if has_models:
+        try:
+            _pydantic_models_in(src, f, rel_path, models, tree)
+        except Exception:
+            pass
+    if has_routes:
+        try:
+            _fastapi_routes_in(src, f, rel_path, routes, tree)
+        except Exception:
+            pass
+    return {"models": models, "routes": routes}
+
 def link_request_models(routes, model_index):
     """Link FastAPI routes to Pydantic request models."""
-    items = []
+    # Keyed by (name, path, route) as items are found: de-duped, first-seen order
+    uniq = {}
     for r in routes:
         for p in r["params"]:
             mname = p["annotation"]
@@ -1273,24 +1343,18 @@ def link_request_models(routes, model_index):
                 continue
             if mname in model_index:
                 m = model_index[mname]
-                items.append({
+                key = (mname, m["path"], r["route"])
+                if key in uniq:
+                    continue
+                uniq[key] = {
                     "type": "requestSchema",
                     "name": mname,
                     "path": m["path"],
                     "fields": m["fields"],
                     "referencedAt": f'{r["file"]}:{r["decorator_lineno"]}',
                     "route": r["route"]
-                })
-    # de-dupe by (name, path, route)
-    seen = set()
-    uniq = []
-    for it in items:
-        key = (it["name"], it["path"], it["route"])
-        if key in seen: 
-            continue
-        seen.add(key)
-        uniq.append(it)
-    return uniq
+                }
+    return list(uniq.values())
 
 def detect_response_models(routes, model_index):
     """Detect FastAPI response models."""
@@ -1311,27 +1375,28 @@ def detect_response_models(routes, model_index):
 def detect_artifact_outputs(repo_root: Path):
     """Detect artifact outputs (PDFs, slides, emails)."""
     items = []
+    root_len = len(str(repo_root)) + 1
     for f in iter_py_files(repo_root):
         try:
             p = f.as_posix().lower()
             src = f.read_text(encoding="utf-8", errors="ignore").lower()
+            rel_path = str(f)[root_len:]
             if "pdf" in p or "services/pdf" in p or "render" in src and "pdf" in src:
-                items.append({"type":"artifact","name":"pdf","path": str(f.relative_to(repo_root)), "usedFor":"Generated PDF document"})
+                items.append({"type":"artifact","name":"pdf","path": rel_path, "usedFor":"Generated PDF document"})
             if "slides" in p or "pptx" in src:
-                items.append({"type":"artifact","name":"slides","path": str(f.relative_to(repo_root)), "usedFor":"Generated slides"})
+                items.append({"type":"artifact","name":"slides","path": rel_path, "usedFor":"Generated slides"})
             if "email" in p or "sendgrid" in src or "smtplib" in src:
-                items.append({"type":"email","name":"transactional_email","path": str(f.relative_to(repo_root)), "usedFor":"Sends transactional email"})
+                items.append({"type":"email","name":"transactional_email","path": rel_path, "usedFor":"Sends transactional email"})
         except Exception:
             continue
-    # de-dupe by (type,name,path)
-    seen, uniq = set(), []
+    # de-dupe by (type,name,path), keeping first-seen order
+    uniq = {}
     for it in items:
-        key = (it["type"], it["name"], it["path"])
-        if key in seen: 
-            continue
-        seen.add(key)
-        uniq.append(it)
-    return uniq
+        uniq.setdefault((it["type"], it["name"], it["path"]), it)
+    return list(uniq.values())
+
+_CORS_ORIGINS_RE = re.compile(r'allowed_origins\s*=\s*\[([^\]]+)\]')
+_CORS_METHODS_RE = re.compile(r'allowed_methods\s*=\s*\[([^\]]+)\]')
 
 def extract_cors_policies(text: str, path: str) -> List[Dict[str, Any]]:
     """Extract CORS middleware configuration."""
@@ -1343,12 +1408,12 @@ def extract_cors_policies(text: str, path: str) -> List[Dict[str, Any]]:
             methods = []
             
             # Look for allowed_origins
-            origins_match = re.search(r'allowed_origins\s*=\s*\[([^\]]+)\]', text)
+            origins_match = _CORS_ORIGINS_RE.search(text)
             if origins_match:
                 origins = [o.strip().strip('"\'') for o in origins_match.group(1).split(',')]
             
             # Look for allowed_methods
-            methods_match = re.search(r'allowed_methods\s*=\s*\[([^\]]+)\]', text)
+            methods_match = _CORS_METHODS_RE.search(text)
             if methods_match:
                 methods = [m.strip().strip('"\'') for m in methods_match.group(1).split(',')]
             
@@ -1408,9 +1473,12 @@ def synthesize_request_schemas(routes):
             # include any non-path param as part of the body/query
             fields.append(p["name"])
         if fields:
+            # Same as Path(file).stem for the "/"-separated .py paths routes carry
+            name = r["file"].rpartition("/")[2]
+            stem = name.rpartition(".")[0] or name
             items.append({
                 "type": "requestSchema",
-                "name": f"{Path(r['file']).stem}.{r['func']}Request",
+                "name": f"{stem}.{r['func']}Request",
                 "path": r["file"],
                 "fields": fields,
                 "route": r["route"],
@@ -1608,17 +1676,17 @@ def extract_sqlalchemy_models(text: str, path: str) -> List[Dict[str, Any]]:
         pass
     return models
 
+# os.getenv("X") and environ["X"] (the latter also covers os.environ["X"])
+_ENV_KEY_PATTERNS = (
+    re.compile(r'os\.getenv\(\s*[\'"]([A-Z0-9_]+)[\'"]\s*\)'),
+    re.compile(r'environ\[\s*[\'"]([A-Z0-9_]+)[\'"]\s*\]'),
+)
+
 def extract_env_keys(text: str, path: str) -> List[Dict[str, Any]]:
     """Extract environment variable keys from Python code."""
     keys = set()
-    # Pattern for os.getenv() and os.environ[]
-    patterns = [
-        r'os\.getenv\(\s*[\'"]([A-Z0-9_]+)[\'"]\s*\)',
-        r'environ\[\s*[\'"]([A-Z0-9_]+)[\'"]\s*\]',
-        r'os\.environ\[\s*[\'"]([A-Z0-9_]+)[\'"]\s*\]'
-    ]
-    for pattern in patterns:
-        for match in re.finditer(pattern, text):
+    for pattern in _ENV_KEY_PATTERNS:
+        for match in pattern.finditer(text):
             keys.add(match.group(1))
     
     # Also extract from Pydantic Settings class attributes (uppercase field names)
@@ -1794,6 +1862,8 @@ def extract_fastapi_routes(text: str, path: str) -> List[Dict[str, Any]]:
         pass
     return routes
 
+_ROUTE_DECORATOR_RE = re.compile(r'@(app|router)\.(get|post|put|delete|patch)')
+
 def parse_python_file(p: Path, snapshot: Path = None, available_files: List[str] = None) -> Dict[str, Any]:
     """Parse Python file with Tree-sitter → libcst → ast fallback chain."""
     text = _read_text(p)
@@ -1936,7 +2006,7 @@ def parse_python_file(p: Path, snapshot: Path = None, available_files: List[str]
     if (hints.get("isRoute") or 
         hints.get("isAPI") or 
         routes or 
-        re.search(r'@(app|router)\.(get|post|put|delete|patch)', text) or
+        _ROUTE_DECORATOR_RE.search(text) or
         any(func.get("name") in ["GET", "POST", "PUT", "DELETE", "PATCH"] for func in functions) or
         pydantic_models or
         sqlalchemy_models):
@@ -1,18 +1,19 @@
 from __future__ import annotations
+import heapq
 import json
 import re
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
-from .llm.client import LLMClient
+from .llm.client import get_llm_client
+from .utils.io import read_json
 
 
-def _read_json(p: Path) -> Dict[str, Any]:
-    return json.loads(p.read_text(encoding="utf-8"))
+_TOKEN_RE = re.compile(r"[a-zA-Z0-9_./-]+")
 
 
 def _tokenize(s: str) -> List[str]:
-    return re.findall(r"[a-zA-Z0-9_./-]+", (s or "").lower())
+    return _TOKEN_RE.findall((s or "").lower())
 
 
 def _score_file(q_tokens: List[str], f: Dict[str, Any]) -> float:
@@ -37,6 +38,14 @@ def _score_file(q_tokens: List[str], f: Dict[str, Any]) -> float:
     return score
 
 
+# Per-kind cap on symbols sent to the model; big modules can list hundreds
+_MAX_SYMBOLS = 10
+
+
+def _trim_symbols(symbols: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v[:_MAX_SYMBOLS] if isinstance(v, list) else v for k, v in symbols.items()}
+
+
 def _filter_files_for_capability(files: List[Dict[str, Any]], cap: Dict[str, Any]) -> List[Dict[str, Any]]:
     node_paths = set()
     lanes = cap.get("lanes", {}) or {}
@@ -49,8 +58,8 @@ def _filter_files_for_capability(files: List[Dict[str, Any]], cap: Dict[str, Any
 
 
 async def answer_question(repo_dir: Path, question: str, capability_id: str | None = None) -> Dict[str, Any]:
-    files_payload = _read_json(repo_dir / "files.json")
-    graph_payload = _read_json(repo_dir / "graph.json") if (repo_dir / "graph.json").exists() else {"edges": []}
+    files_payload = read_json(repo_dir / "files.json")
+    graph_payload = read_json(repo_dir / "graph.json") if (repo_dir / "graph.json").exists() else {"edges": []}
 
     # Optional capability scoping
     scoped_files = files_payload.get("files", [])
@@ -59,38 +68,43 @@ async def answer_question(repo_dir: Path, question: str, capability_id: str | No
     if capability_id and caps_index_path.exists():
         cap_path = repo_dir / "capabilities" / capability_id / "capability.json"
         if cap_path.exists():
-            cap_obj = _read_json(cap_path)
+            cap_obj = read_json(cap_path)
             scoped_files = _filter_files_for_capability(scoped_files, cap_obj)
 
     # Retrieve top-k files by simple lexical scoring over path/summary/symbols
     q_tokens = _tokenize(question)
-    scored: List[Tuple[float, Dict[str, Any]]] = []
-    for f in scoped_files:
-        scored.append((_score_file(q_tokens, f), f))
-    scored.sort(key=lambda x: x[0], reverse=True)
-    top = [f for s, f in scored[:20] if s > 0] or [f for s, f in scored[:10]]
+    # Only the top 20 are used, so select them instead of sorting every file
+    # (nlargest is stable on ties, matching the previous sort)
+    scored: List[Tuple[float, Dict[str, Any]]] = heapq.nlargest(
+        20, ((_score_file(q_tokens, f), f) for f in scoped_files), key=lambda x: x[0]
+    )
+    top = [f for s, f in scored if s > 0] or [f for s, f in scored[:10]]
 
     # Build compact context to keep latency low
-    ctx_files = []
-    for f in top:
-        ctx_files.append({
+    ctx_files = [
+        {
             "path": f.get("path"),
             "language": f.get("language"),
             "hints": f.get("hints", {}),
-            "symbols": f.get("symbols", {}),
+            "symbols": _trim_symbols(f.get("symbols", {}) or {}),
             "blurb": (f.get("summary", {}) or {}).get("blurb") or f.get("blurb"),
-        })
+        }
+        for f in top
+    ]
 
     # Edge subset within selected files
-    selected_paths = set([f.get("path") for f in ctx_files])
-    edges = [
-        {"from": e.get("from"), "to": (e.get("resolved") or e.get("to")), "kind": "import" if not e.get("external") else "call"}
-        for e in graph_payload.get("edges", [])
-        if e.get("from") in selected_paths and ((e.get("resolved") or e.get("to")) in selected_paths)
-    ]
+    selected_paths = {f["path"] for f in ctx_files}
+    edges = []
+    for e in graph_payload.get("edges", []):
+        src = e.get("from")
+        if src not in selected_paths:
+            continue
+        dst = e.get("resolved") or e.get("to")
+        if dst in selected_paths:
+            edges.append({"from": src, "to": dst, "kind": "call" if e.get("external") else "import"})
 
     # Prepare LLM
-    llm = LLMClient(cache_dir=repo_dir / "cache_llm")
+    llm = get_llm_client(repo_dir / "cache_llm")
     system = (
         "You are Provis, an expert codebase assistant. Given a user question and a set of relevant files "
         "plus local dependency edges, answer precisely with concrete file paths and next steps. "
@@ -120,7 +134,7 @@ async def answer_question(repo_dir: Path, question: str, capability_id: str | No
     }
     messages = [
         {"role": "system", "content": system},
-        {"role": "user", "content": json.dumps(user, ensure_ascii=False)},
+        {"role": "user", "content": json.dumps(user, separators=(",", ":"), ensure_ascii=False)},
     ]
     try:
         res = await llm.acomplete_json(messages, schema)
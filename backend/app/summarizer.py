@@ -1,18 +1,16 @@
 from __future__ import annotations
 import asyncio
-import json
 import logging
-import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
-from app.llm.client import LLMClient
+from app.llm.client import LLMClient, get_llm_client
 from app.llm.prompts import (
     FILE_SCHEMA, CAPABILITY_SCHEMA, GLOSSARY_SCHEMA,
     file_messages, capability_messages, glossary_messages,
 )
-from app.utils.io import write_json_atomic
+from app.utils.io import read_json, write_json_atomic_async
 from app.config import settings
 from app.observability import get_metrics_collector
 
@@ -23,14 +21,21 @@ logger = logging.getLogger(__name__)
 def _now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
-def _idx_files(files_payload: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
-    return {f["path"]: f for f in files_payload.get("files", [])}
-
 def _internal_deps(graph: Dict[str, Any], src: str) -> List[str]:
     return [e["resolved"] for e in graph.get("edges", []) if e.get("from") == src and not e.get("external") and e.get("resolved")]
 
-def _external_deps(graph: Dict[str, Any], src: str) -> List[str]:
-    return [e["to"] for e in graph.get("edges", []) if e.get("from") == src and e.get("external")]
+def _dep_index(graph: Dict[str, Any]) -> Dict[str, Tuple[List[str], List[str]]]:
+    """Group edges by source once: path -> (internal deps, external deps)."""
+    idx: Dict[str, Tuple[List[str], List[str]]] = {}
+    for e in graph.get("edges", []):
+        src = e.get("from")
+        if e.get("external"):
+            idx.setdefault(src, ([], []))[1].append(e["to"])
+        elif e.get("resolved"):
+            idx.setdefault(src, ([], []))[0].append(e["resolved"])
+    return idx
+
+_NO_DEPS: Tuple[List[str], List[str]] = ([], [])
 
 def _entrypoints(files_payload: Dict[str, Any]) -> List[str]:
     out: List[str] = []
@@ -46,30 +51,33 @@ def _one_hop_flow(graph: Dict[str, Any], entry: str) -> List[str]:
 
 # ---------- LLM funcs ----------
 
+# Hint flag -> blurb prefix, in priority order
+_BLURB_BY_HINT = (
+    ("isRoute", "Route handler for"),
+    ("isAPI", "API endpoint in"),
+    ("isComponent", "React component"),
+    ("isService", "Service module"),
+)
+
 def _generate_file_blurb(file_data: Dict[str, Any]) -> str:
     """Generate a short blurb for a file if LLM summary is not available."""
     language = file_data.get("language", "unknown")
     path = file_data.get("path", "")
     filename = path.split("/")[-1] if path else "file"
     
-    # Try to infer purpose from hints
+    # Try to infer purpose from hints, first matching hint wins
     hints = file_data.get("hints", {})
-    if hints.get("isRoute"):
-        return f"Route handler for {filename}"
-    elif hints.get("isAPI"):
-        return f"API endpoint in {filename}"
-    elif hints.get("isComponent"):
-        return f"React component {filename}"
-    elif hints.get("isService"):
-        return f"Service module {filename}"
-    elif filename.endswith(".test.") or filename.endswith(".spec."):
+    for hint, prefix in _BLURB_BY_HINT:
+        if hints.get(hint):
+            return f"{prefix} {filename}"
+    if filename.endswith((".test.", ".spec.")):
         return f"Test file for {filename}"
-    else:
-        return f"{language} file {filename}"
+    return f"{language} file {filename}"
 
-async def _summ_file(llm: LLMClient, f: Dict[str, Any], graph: Dict[str, Any]) -> Dict[str, Any]:
+async def _summ_file(llm: LLMClient, f: Dict[str, Any], deps: Dict[str, Tuple[List[str], List[str]]]) -> Dict[str, Any]:
     """Generate LLM summary for a single file with proper error handling."""
     metrics = get_metrics_collector()
+    internal, external = deps.get(f["path"], _NO_DEPS)
     
     # Build compact context (keep ≤1-2k tokens)
     symbols = f.get("symbols", {})
@@ -88,14 +96,12 @@ async def _summ_file(llm: LLMClient, f: Dict[str, Any], graph: Dict[str, Any]) -
         "ext": f.get("ext"),
         "hints": f.get("hints", {}),
         "symbols": trimmed_symbols,
-        "internal_dependencies": _internal_deps(graph, f["path"])[:10],  # Limit to 10 deps
-        "external_dependencies": _external_deps(graph, f["path"])[:10],  # Limit to 10 deps
+        "internal_dependencies": internal[:10],  # Limit to 10 deps
+        "external_dependencies": external[:10],  # Limit to 10 deps
     }
     
-    start_time = time.time()
     try:
         result = await llm.acomplete_json(file_messages(ctx), FILE_SCHEMA)
-        duration_ms = (time.time() - start_time) * 1000
         
         # Record successful LLM call
         metrics.record_llm_call(0, 0, llm.model)  # tokens_in, tokens_out, model
@@ -111,7 +117,6 @@ async def _summ_file(llm: LLMClient, f: Dict[str, Any], graph: Dict[str, Any]) -
             result["vibecoder_summary"] = "This file is part of the application."
         return result
     except Exception as e:
-        duration_ms = (time.time() - start_time) * 1000
         logger.warning(f"LLM summary failed for {f['path']}: {e}")
         
         # Record failed LLM call
@@ -214,10 +219,8 @@ async def _build_glossary(llm: LLMClient, files_payload: Dict[str, Any]) -> Dict
     repo_terms = _extract_repo_terms(files_payload)
     all_terms = list(set(base_terms + repo_terms))[:50]  # Cap at 50 terms
     
-    start_time = time.time()
     try:
         result = await llm.acomplete_json(glossary_messages(all_terms), GLOSSARY_SCHEMA)
-        duration_ms = (time.time() - start_time) * 1000
         
         # Record successful LLM call
         metrics.record_llm_call(0, 0, llm.model)  # tokens_in, tokens_out, model
@@ -227,7 +230,6 @@ async def _build_glossary(llm: LLMClient, files_payload: Dict[str, Any]) -> Dict
             result["terms"] = []
         return result
     except Exception as e:
-        duration_ms = (time.time() - start_time) * 1000
         logger.warning(f"LLM glossary generation failed: {e}")
         
         # Record failed LLM call
@@ -242,6 +244,44 @@ async def _build_glossary(llm: LLMClient, files_payload: Dict[str, Any]) -> Dict
             ]
         }
 
+async def _capabilities_payload(repo_dir: Path, files_payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Build capabilities on disk and return the summary payload, never raising."""
+    logger.info("Generating capabilities")
+    try:
+        from app.capabilities import build_all_capabilities
+        capability_ids = await build_all_capabilities(repo_dir)
+        return {
+            "repoId": files_payload.get("repoId", "unknown"),
+            "generatedAt": _now(),
+            "capabilities": capability_ids if isinstance(capability_ids, list) else [],
+            "warnings": []
+        }
+    except Exception as e:
+        logger.error(f"Capability generation failed: {e}")
+        return {
+            "repoId": files_payload.get("repoId", "unknown"),
+            "generatedAt": _now(),
+            "capabilities": [],
+            "warnings": [f"Capability generation failed: {str(e)}"]
+        }
+
+async def _glossary_payload(llm: LLMClient, files_payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the glossary payload, never raising."""
+    logger.info("Generating glossary")
+    try:
+        glossary_payload = await _build_glossary(llm, files_payload)
+        glossary_payload["generatedAt"] = _now()
+        return glossary_payload
+    except Exception as e:
+        logger.error(f"Glossary generation failed: {e}")
+        return {
+            "terms": [
+                {"term": "function", "dev_definition": "Reusable block of code.", "vibecoder_definition": "A recipe you can run."}
+            ],
+            "generatedAt": _now(),
+            "warnings": [f"Glossary generation failed: {str(e)}"]
+        }
+
 # ---------- public entry ----------
 
 async def run_summarization(repo_dir: Path) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
@@ -259,19 +299,19 @@ async def run_summarization(repo_dir: Path) -> Tuple[Dict[str, Any], Dict[str, A
     if not files_path.exists():
         raise FileNotFoundError(f"files.json not found in {repo_dir}")
     
-    files_payload = json.loads(files_path.read_text(encoding="utf-8"))
+    files_payload = read_json(files_path)
     
     # Graph is optional, provide empty fallback
     if graph_path.exists():
-        graph_payload = json.loads(graph_path.read_text(encoding="utf-8"))
+        graph_payload = read_json(graph_path)
     else:
         graph_payload = {"edges": []}
         logger.warning(f"graph.json not found in {repo_dir}, using empty graph")
     
     # Initialize LLM client
-    llm = LLMClient(cache_dir=repo_dir / "cache_llm")
+    llm = get_llm_client(repo_dir / "cache_llm")
     files = files_payload.get("files", [])
-    idx = _idx_files(files_payload)
+    deps = _dep_index(graph_payload)
     
     # Track metrics
     llm_calls = 0
@@ -297,7 +337,7 @@ async def run_summarization(repo_dir: Path) -> Tuple[Dict[str, Any], Dict[str, A
     
     async def process_file_with_semaphore(f):
         async with semaphore:
-            return await _summ_file(llm, f, graph_payload)
+            return await _summ_file(llm, f, deps)
     
     try:
         file_summaries = await asyncio.gather(
@@ -311,6 +351,7 @@ async def run_summarization(repo_dir: Path) -> Tuple[Dict[str, Any], Dict[str, A
     
     # Attach summaries to files and ensure required fields
     for i, f in enumerate(non_skipped_files):
+        internal, external = deps.get(f["path"], _NO_DEPS)
         if i < len(file_summaries) and not isinstance(file_summaries[i], Exception):
             summary = file_summaries[i]
             f["summary"] = summary
@@ -322,8 +363,8 @@ async def run_summarization(repo_dir: Path) -> Tuple[Dict[str, Any], Dict[str, A
                 "title": f["path"].split("/")[-1],
                 "purpose": f"A {f.get('language', 'unknown')} file.",
                 "key_functions": f.get("symbols", {}).get("functions", [])[:5],
-                "internal_dependencies": _internal_deps(graph_payload, f["path"])[:10],
-                "external_dependencies": _external_deps(graph_payload, f["path"])[:10],
+                "internal_dependencies": internal[:10],
+                "external_dependencies": external[:10],
                 "how_to_modify": "Edit this file to modify its functionality.",
                 "risks": "Be careful when modifying this file.",
                 "blurb": _generate_file_blurb(f),
@@ -338,47 +379,22 @@ async def run_summarization(repo_dir: Path) -> Tuple[Dict[str, Any], Dict[str, A
     if repo_warnings:
         files_payload["warnings"] = repo_warnings
     
-    # Atomic write of updated files.json
-    write_json_atomic(files_path, files_payload)
-    logger.info(f"Updated files.json with {files_summarized} summaries")
-    
-    # ---- Capabilities generation ----
-    logger.info("Generating capabilities")
-    try:
-        from app.capabilities import build_all_capabilities
-        capability_ids = await build_all_capabilities(repo_dir)
-        capabilities_payload = {
-            "repoId": files_payload.get("repoId", "unknown"),
-            "generatedAt": _now(),
-            "capabilities": capability_ids if isinstance(capability_ids, list) else [],
-            "warnings": []
-        }
-    except Exception as e:
-        logger.error(f"Capability generation failed: {e}")
-        capabilities_payload = {
-            "repoId": files_payload.get("repoId", "unknown"),
-            "generatedAt": _now(),
-            "capabilities": [],
-            "warnings": [f"Capability generation failed: {str(e)}"]
-        }
+    # Atomic write of updated files.json, off the event loop and overlapped with the
+    # capability and glossary work below (neither reads files.json back from disk)
+    files_write = asyncio.ensure_future(write_json_atomic_async(files_path, files_payload))
     
-    # ---- Glossary generation ----
-    logger.info("Generating glossary")
-    try:
-        glossary_payload = await _build_glossary(llm, files_payload)
-        glossary_payload["generatedAt"] = _now()
-    except Exception as e:
-        logger.error(f"Glossary generation failed: {e}")
-        glossary_payload = {
-            "terms": [
-                {"term": "function", "dev_definition": "Reusable block of code.", "vibecoder_definition": "A recipe you can run."}
-            ],
-            "generatedAt": _now(),
-            "warnings": [f"Glossary generation failed: {str(e)}"]
-        }
+    # ---- Capabilities and glossary ----
+    # Independent of each other. The glossary goes first so its LLM request is in flight
+    # while the (mostly synchronous) capability build runs.
+    glossary_payload, capabilities_payload = await asyncio.gather(
+        _glossary_payload(llm, files_payload),
+        _capabilities_payload(repo_dir, files_payload),
+    )
+    await files_write
+    logger.info(f"Updated files.json with {files_summarized} summaries")
     
     # Atomic write for glossary only (capabilities are written by build_all_capabilities)
-    write_json_atomic(repo_dir / "glossary.json", glossary_payload)
+    await write_json_atomic_async(repo_dir / "glossary.json", glossary_payload)
     
     # Note: Legacy capabilities.json is no longer written to avoid duplication
     # The canonical artifacts are in capabilities/index.json and capabilities/{id}/capability.json
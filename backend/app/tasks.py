@@ -2,6 +2,7 @@
 Task functions for the Step 2 infrastructure upgrade.
 All tasks are idempotent and retryable.
 """
+import asyncio
 import os
 import json
 import logging
@@ -23,10 +24,28 @@ from app.parsers.python import parse_python_file
 from app.utils.zip_safe import extract_zip_safely, cleanup_extraction
 from app.limits import get_limits
 from app.summarizer import run_summarization
+from app.llm.client import close_llm_transport
 from app.observability import get_metrics_collector
 
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+def _run_coroutine(coro):
+    """Drive an async task body to completion from a sync worker, on uvloop when installed."""
+    loop = uvloop.new_event_loop() if UVLOOP_AVAILABLE else asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        # Release the loop's shared LLM HTTP pool while the loop can still run it
+        loop.run_until_complete(close_llm_transport())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
 def _run_task_with_metrics(task_name: str, fn, *args, **kwargs):
     """Run a task with metrics instrumentation."""
     metrics = get_metrics_collector()
@@ -35,6 +54,9 @@ def _run_task_with_metrics(task_name: str, fn, *args, **kwargs):
     
     try:
         result = fn(*args, **kwargs)
+        if asyncio.iscoroutine(result):
+            # Async task bodies (e.g. summarize) must be run, not returned unawaited
+            result = _run_coroutine(result)
         duration_ms = (time.perf_counter() - start_time) * 1000
         metrics.record_task_completion(task_name, duration_ms, True)
         return result
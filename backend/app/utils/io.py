@@ -1,5 +1,6 @@
 from __future__ import annotations
 from pathlib import Path
+import asyncio
 import json
 import os
 import tempfile
@@ -8,6 +9,12 @@ from dataclasses import is_dataclass, asdict
 from datetime import datetime, date
 from enum import Enum
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 
 def _safe_default(o: Any):
     """Best-effort JSON serializer for Pydantic models, dataclasses, Paths, Enums, sets, and datetimes."""
@@ -38,11 +45,42 @@ def _safe_default(o: Any):
     # Fallback: try stringifying
     return str(o)
 
-def write_json_atomic(path: Path, obj: Any) -> None:
+def _dumps_bytes(obj: Any, indent: bool = True) -> bytes:
+    """Serialize to UTF-8 JSON bytes, preferring orjson and falling back to stdlib json.
+
+    ``indent=False`` writes compact JSON, for files only the app itself reads.
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(obj, option=option, default=_safe_default)
+        except TypeError:
+            # orjson rejects some inputs (e.g. ints wider than 64 bits); stdlib handles them
+            pass
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=_safe_default).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_safe_default).encode("utf-8")
+
+def loads_json(data: bytes) -> Any:
+    """Parse UTF-8 JSON bytes, using orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data.decode("utf-8"))
+
+def read_json(path: Path) -> Any:
+    """Read and parse a JSON file, using orjson when available."""
+    return loads_json(path.read_bytes())
+
+def write_json_atomic(path: Path, obj: Any, indent: bool = True) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    data = json.dumps(obj, indent=2, ensure_ascii=False, default=_safe_default)
+    data = _dumps_bytes(obj, indent)
     dirpath = str(path.parent)
-    with tempfile.NamedTemporaryFile("w", delete=False, dir=dirpath, prefix=".tmp_", suffix=".json") as tmp:
+    with tempfile.NamedTemporaryFile("wb", delete=False, dir=dirpath, prefix=".tmp_", suffix=".json") as tmp:
         tmp.write(data)
         tmp_path = Path(tmp.name)
     os.replace(tmp_path, path)
+
+async def write_json_atomic_async(path: Path, obj: Any) -> None:
+    """Run write_json_atomic on the default executor so concurrent writes overlap."""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, write_json_atomic, path, obj)
@@ -151,6 +151,8 @@ class SecureZipExtractor:
         # Create temporary directory
         temp_dir = tempfile.mkdtemp(prefix="provis_extract_")
         temp_path = Path(temp_dir)
+        # Resolved once: the containment check below runs for every entry
+        temp_root = temp_path.resolve()
         
         try:
             with zipfile.ZipFile(zip_path, 'r') as zip_file:
@@ -164,7 +166,7 @@ class SecureZipExtractor:
                     
                     # Ensure target is within temp directory
                     try:
-                        target_path.resolve().relative_to(temp_path.resolve())
+                        target_path.resolve().relative_to(temp_root)
                     except ValueError:
                         raise ZipExtractionError(f"Path outside extraction directory: {zip_info.filename}")
                     
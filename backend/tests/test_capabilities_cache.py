@@ -0,0 +1,158 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from app import capabilities
+from app.config import settings
+
+
+def write(p: Path, text: str = ""):
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(text)
+
+
+MODELS_SRC = """
+from pydantic import BaseModel
+
+class Prospect(BaseModel):
+    name: str
+    email: str
+"""
+
+
+def test_cached_extract_hits_and_invalidates(tmp_path: Path):
+    cache = tmp_path / "cache"
+    src = tmp_path / "repo/app/models.py"
+    write(src, MODELS_SRC)
+
+    first = capabilities._cached_extract(src, "app/models.py", cache_dir=cache)
+    assert first["models"]["Prospect"]["fields"] == ["name", "email"]
+    assert len(list(cache.glob("*.pkl"))) == 1
+
+    # Warm hit returns the same result without re-parsing, from memory or disk
+    assert capabilities._cached_extract(src, "app/models.py", cache_dir=cache) is first
+    capabilities._extract_file_once.cache_clear()
+    assert capabilities._cached_extract(src, "app/models.py", cache_dir=cache) == first
+
+    # Editing the file (new size + mtime) invalidates the entry
+    write(src, MODELS_SRC + "    phone: str\n")
+    st = src.stat()
+    os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    second = capabilities._cached_extract(src, "app/models.py", cache_dir=cache)
+    assert second["models"]["Prospect"]["fields"] == ["name", "email", "phone"]
+
+
+def test_parse_cache_lives_in_the_repo_dir(tmp_path: Path, monkeypatch):
+    repo = tmp_path / "repo"
+    monkeypatch.setattr(settings, "PARSE_CACHE", True)
+    # Without a snapshot/ the repo dir holds user files, so nothing is unpickled from it
+    assert capabilities._parse_cache_dir(repo) is None
+    (repo / "snapshot").mkdir(parents=True)
+    assert capabilities._parse_cache_dir(repo) == repo / "cache_parse"
+    monkeypatch.setattr(settings, "PARSE_CACHE", False)
+    assert capabilities._parse_cache_dir(repo) is None
+
+    src = repo / "snapshot/app/models.py"
+    write(src, MODELS_SRC)
+    out = capabilities._cached_extract(src, "app/models.py")
+    assert "Prospect" in out["models"]
+    assert not (repo / "cache_parse").exists()
+
+
+def test_scan_source_files_py_listing_matches_iter_py_files(tmp_path: Path):
+    from app.parsers.base import scan_source_files
+    from app.parsers.python import iter_py_files
+
+    for rel in ("main.py", "app/models.py", "app/routers/items.py", "env.py",
+                ".venv/lib/x.py", "venv/y.py", "app/__pycache__/z.py", "runs/r.py", "app/notes.txt"):
+        write(tmp_path / rel, "x = 1\n")
+
+    _, scanned = scan_source_files(tmp_path)
+    assert [p for p, _, _ in scanned] == list(iter_py_files(tmp_path))
+    for p, rel_path, st in scanned:
+        assert rel_path == str(p.relative_to(tmp_path))
+        assert st.st_size == p.stat().st_size
+
+
+def test_extract_all_parallel_matches_serial(tmp_path: Path, monkeypatch):
+    from app.parsers.base import scan_source_files
+
+    monkeypatch.setattr(settings, "PARSE_CACHE", False)
+    for i in range(4):
+        write(tmp_path / f"app/models_{i}.py", MODELS_SRC.replace("Prospect", f"Prospect{i}"))
+    _, py_scan = scan_source_files(tmp_path)
+
+    monkeypatch.setattr(settings, "PY_PARSE_PARALLEL_MIN_FILES", 10_000)
+    serial = capabilities._extract_all(py_scan)
+    monkeypatch.setattr(settings, "PY_PARSE_WORKERS", 2)
+    monkeypatch.setattr(settings, "PY_PARSE_PARALLEL_MIN_FILES", 2)
+    assert capabilities._extract_all(py_scan) == serial
+
+
+def test_read_capability_by_id_returns_fresh_dicts_and_sees_rewrites(tmp_path: Path):
+    capabilities.write_capability(tmp_path, {"id": "cap_x", "name": "X"})
+
+    first = capabilities.read_capability_by_id(tmp_path, "cap_x")
+    first["name"] = "mutated by caller"
+    assert capabilities.read_capability_by_id(tmp_path, "cap_x")["name"] == "X"
+
+    capabilities.write_capability(tmp_path, {"id": "cap_x", "name": "X, rebuilt"})
+    assert capabilities.read_capability_by_id(tmp_path, "cap_x")["name"] == "X, rebuilt"
+
+    with pytest.raises(FileNotFoundError):
+        capabilities.read_capability_by_id(tmp_path, "cap_missing")
+
+
+def test_build_capability_memoized_by_fingerprint(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(settings, "PARSE_CACHE", False)
+    repo = tmp_path / "repo"
+    write(repo / "requirements.txt", "fastapi\n")
+    write(repo / "app/main.py", "x = 1\n")
+
+    first = capabilities.build_capability(repo)
+    first["id"] = "mutated_by_caller"
+    second = capabilities.build_capability(repo)
+    assert second["id"] == "cap_main_workflow"
+    assert second["swimlanes"] is not first["swimlanes"]
+
+    # A shared data_flow is kept by reference on a hit
+    again = capabilities.build_capability(repo, second["data_flow"])
+    assert again["data_flow"] is second["data_flow"]
+
+    # New files change the fingerprint and show up in the rebuilt capability
+    write(repo / "app/routers/items.py", "y = 2\n")
+    third = capabilities.build_capability(repo)
+    assert "app/routers/items.py" in third["nodeIndex"]
+
+
+def test_build_capability_cache_is_thread_safe(tmp_path: Path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    monkeypatch.setattr(settings, "PARSE_CACHE", False)
+    # A small cache makes concurrent builds evict each other's entries
+    monkeypatch.setattr(capabilities, "_BUILD_CACHE_SIZE", 2)
+    repos = []
+    for i in range(6):
+        repo = tmp_path / f"repo{i}"
+        write(repo / "app/main.py", f"x = {i}\n")
+        repos.append(repo)
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        caps = list(pool.map(capabilities.build_capability, repos * 4))
+    assert all(c["id"] == "cap_main_workflow" for c in caps)
+    assert len(capabilities._BUILD_CACHE) <= 2
+
+
+def test_scan_source_files_matches_separate_walks(tmp_path: Path):
+    from app.parsers.base import iter_all_source_files, scan_source_files
+    from app.parsers.python import iter_py_files
+
+    for rel in ("main.py", "app/models.py", "app/page.TSX", "web/index.js", "env.py",
+                "tests/test_x.py", "node_modules/pkg/index.js", "build/gen.py", "out/x.ts",
+                ".venv/lib/x.py", "app/__pycache__/z.py", "runs/r.py", "README.md"):
+        write(tmp_path / rel, "x = 1\n")
+
+    source_files, py_scan = scan_source_files(tmp_path)
+    assert source_files == list(iter_all_source_files(tmp_path))
+    assert [p for p, _, _ in py_scan] == list(iter_py_files(tmp_path))
@@ -0,0 +1,101 @@
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.llm import client as llm_client
+
+
+class FakeAsyncOpenAI:
+    """Stands in for openai.AsyncOpenAI; records chat.completions.create calls."""
+
+    calls: list = []
+
+    def __init__(self, api_key=None):
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def close(self):
+        self.closed = True
+
+    async def _create(self, **kwargs):
+        FakeAsyncOpenAI.calls.append(kwargs)
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='{"title": "x"}'))])
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(llm_client, "AsyncOpenAI", FakeAsyncOpenAI)
+    FakeAsyncOpenAI.calls = []
+    return FakeAsyncOpenAI
+
+
+def test_coalesces_identical_inflight_requests(tmp_path: Path, monkeypatch, fake_openai):
+    monkeypatch.setattr(settings, "LLM_CACHE", True)
+    messages = [{"role": "user", "content": "same prompt"}]
+
+    async def run():
+        llm = llm_client.LLMClient(cache_dir=tmp_path)
+        results = await asyncio.gather(*[llm.acomplete_json(messages, {"type": "object"}) for _ in range(3)])
+        return llm, results
+
+    llm, results = asyncio.run(run())
+    assert len(fake_openai.calls) == 1
+    assert results == [{"title": "x"}] * 3
+    # Each caller gets its own dict, so mutating one result cannot leak into another
+    assert len({id(r) for r in results}) == 3
+    assert llm._inflight == {}
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+
+def test_get_llm_client_shares_transport_per_loop(tmp_path: Path, fake_openai):
+    async def clients():
+        a = llm_client.get_llm_client(tmp_path / "repo_a" / "cache_llm")
+        b = llm_client.get_llm_client(tmp_path / "repo_b" / "cache_llm")
+        return a, b
+
+    async def clients_then_close():
+        a, b = await clients()
+        await llm_client.close_llm_transport()
+        return a, b
+
+    a, b = asyncio.run(clients())
+    # One HTTP pool, limit and in-flight map per loop; caches stay per repo
+    assert a.client is b.client and a._sem is b._sem and a._inflight is b._inflight
+    assert a.cache_dir != b.cache_dir
+    # A new event loop gets its own transport, and closing releases it
+    c, _ = asyncio.run(clients_then_close())
+    assert c.client is not a.client
+    assert c.client.closed
+
+
+def test_adaptive_limit_backs_off_on_rate_limit():
+    import httpx
+    from openai import RateLimitError
+
+    def rate_limited():
+        response = httpx.Response(429, request=httpx.Request("POST", "https://api.test"))
+        return RateLimitError("slow down", response=response, body=None)
+
+    async def run():
+        limit = llm_client._AdaptiveLimit(3)
+        for _ in range(5):
+            with pytest.raises(RateLimitError):
+                async with limit:
+                    raise rate_limited()
+        # Never drops below one request in flight
+        assert limit.limit == 1
+        async with limit:
+            pass
+        assert limit.limit == 2
+        # Other errors neither shrink nor restore the limit
+        with pytest.raises(ValueError):
+            async with limit:
+                raise ValueError("bad payload")
+        assert limit.limit == 2
+
+    asyncio.run(run())
@@ -0,0 +1,14 @@
+from app.llm.prompts import capability_messages, file_messages
+
+
+def test_file_messages_redact_double_quoted_secrets():
+    content = file_messages({"path": "app/config.py", "note": 'API_KEY = "sk-live-123"'})[1]["content"]
+    assert "sk-live-123" not in content
+    assert "***REDACTED***" in content
+
+
+def test_capability_messages_redact_nested_secrets():
+    ctx = {"files": [{"snippet": "password: 'hunter2'"}, {"snippet": 'DATABASE_URL="postgres://u:p@h/db"'}]}
+    content = capability_messages(ctx)[1]["content"]
+    assert "hunter2" not in content
+    assert "postgres://" not in content